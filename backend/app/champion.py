@@ -2,34 +2,20 @@
 
 import os
 import logging
-import json
-import re
-from google import genai
-from google.genai import types
 from dotenv import load_dotenv
+from app.gemini_analyzer import get_genai_client, extract_json as _extract_json
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
 def extract_json(text: str):
     """
-    Robust JSON extraction (Matches your gemini_analyzer logic).
+    Robust JSON extraction (shares gemini_analyzer's parser); {} when none is found.
     """
+    if not text: return {}
     try:
-        if not text: return {}
-        cleaned = text.strip()
-        # Handle Markdown fences
-        if "```" in cleaned:
-            pattern = r"```(?:json)?\s*(\{.*?\})\s*```"
-            match = re.search(pattern, cleaned, re.DOTALL)
-            if match: return json.loads(match.group(1))
-        
-        # Fallback regex
-        match = re.search(r'\{.*\}', cleaned, re.DOTALL)
-        if match: return json.loads(match.group(0))
-        
-        return json.loads(cleaned)
-    except:
+        return _extract_json(text)
+    except ValueError:
         return {}
 
 def check_security_champion(diff_text):
@@ -41,7 +27,8 @@ def check_security_champion(diff_text):
     if not api_key: return None
 
     try:
-        client = genai.Client(api_key=api_key)
+        from google.genai import types
+        client = get_genai_client(api_key)
         
         prompt = f"""
         You are a Security Culture Expert. Analyze this code diff.
@@ -5,41 +5,88 @@ Author: ANIRUDH S J
 """
 import os
 import logging
+import threading
+import time
 from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
 from sqlalchemy import create_engine, event
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import QueuePool
+from sqlalchemy.engine import URL
+from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
+from sqlalchemy.pool import NullPool, QueuePool
 
 logger = logging.getLogger(__name__)
 
 # SQLAlchemy Base for model definitions
 Base = declarative_base()
 
-# Global engine and session factory
+# Global engine and session factory (SessionLocal is set by init_engine)
 _engine = None
-_SessionLocal = None
+SessionLocal = None
+_init_lock = threading.Lock()
 
+# Connection pool sizing; the default pool follows the cores * 2 + 1 rule
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", str((os.cpu_count() or 4) * 2 + 1)))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
 
+# Where Cloud Run mounts Cloud SQL sockets (--add-cloudsql-instances)
+CLOUD_SQL_SOCKET_ROOT = "/cloudsql"
+
+
+def _pool_options() -> dict:
+    """QueuePool settings shared by the Cloud SQL and local engines."""
+    return {
+        "poolclass": QueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": 1800,
+        # Test connections on checkout instead of failing the request on a stale one
+        "pool_pre_ping": True,
+        # Reuse the most recently returned connection so idle ones can be recycled
+        "pool_use_lifo": True,
+    }
+
+
+def _cloud_sql_socket_dir(instance_connection_name: str) -> str:
+    return f"{CLOUD_SQL_SOCKET_ROOT}/{instance_connection_name}"
+
+
+@lru_cache(maxsize=1)
 def get_database_url() -> str:
     """
-    Get database URL based on environment.
+    Get database URL based on environment (read once per process).
     
-    For Cloud SQL: Uses Cloud SQL Python Connector
+    For PgBouncer: TCP connection to PGBOUNCER_HOST (transaction pooling)
+    For Cloud SQL: psycopg2 over the Cloud Run Unix socket
+                   (init_engine falls back to the Python Connector)
     For Local: Uses standard PostgreSQL connection string
     """
+    pgbouncer_host = os.getenv("PGBOUNCER_HOST")
+    if pgbouncer_host:
+        return URL.create(
+            "postgresql+pg8000",
+            username=os.getenv("DB_USER", "postgres"),
+            password=os.getenv("DB_PASS", ""),
+            host=pgbouncer_host,
+            port=int(os.getenv("PGBOUNCER_PORT", "6432")),
+            database=os.getenv("DB_NAME", "atf_sentinel"),
+        ).render_as_string(hide_password=False)
+
     # Check if running in Cloud Run with Cloud SQL
     instance_connection_name = os.getenv("CLOUD_SQL_CONNECTION_NAME")
     
     if instance_connection_name:
-        # Cloud SQL connection using Unix socket
-        db_user = os.getenv("DB_USER", "postgres")
-        db_pass = os.getenv("DB_PASS", "")
-        db_name = os.getenv("DB_NAME", "atf_sentinel")
-        
-        # Cloud Run provides Unix socket at /cloudsql/<instance>
-        socket_path = f"/cloudsql/{instance_connection_name}"
-        
-        return f"postgresql+pg8000://{db_user}:{db_pass}@/{db_name}?unix_sock={socket_path}/.s.PGSQL.5432"
+        # Cloud Run provides Unix socket at /cloudsql/<instance>; psycopg2
+        # (libpq, C) costs far less CPU per query than pure-Python pg8000
+        return URL.create(
+            "postgresql+psycopg2",
+            username=os.getenv("DB_USER", "postgres"),
+            password=os.getenv("DB_PASS", ""),
+            database=os.getenv("DB_NAME", "atf_sentinel"),
+            query={"host": _cloud_sql_socket_dir(instance_connection_name)},
+        ).render_as_string(hide_password=False)
     
     # Local development - standard PostgreSQL URL
     return os.getenv(
@@ -53,10 +100,17 @@ def init_engine():
     Initialize the SQLAlchemy engine.
     Called once at application startup.
     """
-    global _engine, _SessionLocal
-    
     if _engine is not None:
         return _engine
+    # Concurrent first callers must not each build an engine (and a pool)
+    with _init_lock:
+        if _engine is not None:
+            return _engine
+        return _create_engine()
+
+
+def _create_engine():
+    global _engine, SessionLocal
     
     database_url = get_database_url()
     
@@ -73,48 +127,65 @@ def init_engine():
         # Cloud SQL Python Connector for production
         instance_connection_name = os.getenv("CLOUD_SQL_CONNECTION_NAME")
         
-        if instance_connection_name:
+        if os.getenv("PGBOUNCER_HOST"):
+            # PgBouncer (pool_mode=transaction) already multiplexes server
+            # connections; a second pool here would pin them per instance.
+            # pg8000 only uses unnamed prepared statements, which are safe
+            # in transaction mode.
+            engine = create_engine(
+                database_url,
+                poolclass=NullPool,
+            )
+            logger.info("✅ Connected to PgBouncer")
+        elif instance_connection_name and os.path.isdir(_cloud_sql_socket_dir(instance_connection_name)):
+            # Socket mounted by Cloud Run: connect with psycopg2 directly
+            engine = create_engine(
+                database_url,
+                **_pool_options(),
+            )
+            logger.info("✅ Connected to Cloud SQL via Unix socket")
+        elif instance_connection_name:
+            # No mounted socket: fall back to the Python connector (pg8000)
             from google.cloud.sql.connector import Connector
             
             connector = Connector()
+            # Read once; the creator runs for every new pooled connection
+            db_user = os.getenv("DB_USER", "postgres")
+            db_pass = os.getenv("DB_PASS", "")
+            db_name = os.getenv("DB_NAME", "atf_sentinel")
             
             def get_conn():
                 return connector.connect(
                     instance_connection_name,
                     "pg8000",
-                    user=os.getenv("DB_USER", "postgres"),
-                    password=os.getenv("DB_PASS", ""),
-                    db=os.getenv("DB_NAME", "atf_sentinel"),
+                    user=db_user,
+                    password=db_pass,
+                    db=db_name,
                 )
             
-            _engine = create_engine(
+            engine = create_engine(
                 "postgresql+pg8000://",
                 creator=get_conn,
-                poolclass=QueuePool,
-                pool_size=5,
-                max_overflow=2,
-                pool_timeout=30,
-                pool_recycle=1800,
+                **_pool_options(),
             )
             logger.info("✅ Connected to Cloud SQL via Connector")
         else:
             # Local PostgreSQL
-            _engine = create_engine(
+            engine = create_engine(
                 database_url,
-                poolclass=QueuePool,
-                pool_size=5,
-                max_overflow=2,
-                pool_timeout=30,
-                pool_recycle=1800,
                 echo=os.getenv("SQL_ECHO", "false").lower() == "true",
+                **_pool_options(),
             )
             logger.info("✅ Connected to local PostgreSQL")
         
-        _SessionLocal = sessionmaker(
+        # Publish the session factory before the engine: a caller that sees
+        # _engine set must also see SessionLocal
+        SessionLocal = sessionmaker(
             autocommit=False,
             autoflush=False,
-            bind=_engine
+            bind=engine
         )
+        _engine = engine
         
         return _engine
         
@@ -134,11 +205,11 @@ def get_engine():
 
 def get_session_local():
     """Get the session factory."""
-    if _SessionLocal is None:
+    if SessionLocal is None:
         init_engine()
-    if _SessionLocal is None:
+    if SessionLocal is None:
         raise RuntimeError("Failed to initialize database session factory")
-    return _SessionLocal
+    return SessionLocal
 
 
 @contextmanager
@@ -150,8 +221,8 @@ def get_db_session():
         with get_db_session() as session:
             session.query(Model).all()
     """
-    SessionLocal = get_session_local()
-    session = SessionLocal()
+    # The factory exists once startup has run init_engine()
+    session = (SessionLocal or get_session_local())()
     try:
         yield session
         session.commit()
@@ -162,6 +233,26 @@ def get_db_session():
         session.close()
 
 
+def _new_session():
+    return (SessionLocal or get_session_local())()
+
+
+# One session per HTTP request: main.py's middleware opens a scope for each
+# request and removes the scope's session once the response is ready
+_request_scope: ContextVar = ContextVar("db_request_scope", default=None)
+ScopedSession = scoped_session(_new_session, scopefunc=_request_scope.get)
+
+
+def begin_request_scope():
+    """Start a new session scope for the current request; returns a reset token."""
+    return _request_scope.set(object())
+
+
+def end_request_scope(token):
+    """Leave the request scope (call ScopedSession.remove() first if a session was used)."""
+    _request_scope.reset(token)
+
+
 def get_db():
     """
     Dependency for FastAPI endpoints.
@@ -170,13 +261,13 @@ def get_db():
         @app.get("/items")
         def get_items(db: Session = Depends(get_db)):
             return db.query(Item).all()
+
+    Inside a request this is the request's scoped session, closed by the
+    middleware. Outside one (startup, scripts) the caller must close it.
     """
-    SessionLocal = get_session_local()
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    if _request_scope.get() is not None:
+        return ScopedSession()
+    return _new_session()
 
 
 def create_tables():
@@ -194,22 +285,28 @@ def drop_tables():
 
 
 # Health check function
-def check_database_health() -> dict:
-    """
-    Check database connectivity.
-    
-    Returns:
-        dict with status and details
-    """
+# Seconds a ping result is reused, so frequent load-balancer probes
+# don't each take a pooled connection for SELECT 1
+DB_HEALTH_TTL = float(os.getenv("DB_HEALTH_TTL", "10"))
+_health_cache = (0.0, None)
+_health_lock = threading.Lock()
+
+
+def _ping_database() -> dict:
+    """Run SELECT 1 and report the pool's connection counts alongside."""
     from sqlalchemy import text
     try:
         engine = get_engine()
         with engine.connect() as conn:
             conn.execute(text("SELECT 1"))
-        return {
+        result = {
             "status": "healthy",
             "database": "connected"
         }
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            result["pool"] = {"checked_in": pool.checkedin(), "checked_out": pool.checkedout()}
+        return result
     except Exception as e:
         return {
             "status": "unhealthy",
@@ -217,3 +314,23 @@ def check_database_health() -> dict:
             "error": str(e)
         }
 
+
+def check_database_health() -> dict:
+    """
+    Check database connectivity.
+    
+    The result of the last ping is reused for DB_HEALTH_TTL seconds.
+    
+    Returns:
+        dict with status and details
+    """
+    global _health_cache
+    checked_at, result = _health_cache
+    if result is None or time.monotonic() - checked_at >= DB_HEALTH_TTL:
+        with _health_lock:
+            # Another caller may have refreshed it while we waited
+            checked_at, result = _health_cache
+            if result is None or time.monotonic() - checked_at >= DB_HEALTH_TTL:
+                result = _ping_database()
+                _health_cache = (time.monotonic(), result)
+    return dict(result)
@@ -1,108 +1,112 @@
 # app/email_client.py
 
+import asyncio
 import os
 import logging
+import re
+from html import escape
+from functools import lru_cache
+from string import Template
+import httpx
 from dotenv import load_dotenv
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 from datetime import datetime, timezone, timedelta
+# Alert text is cut the same way as in the Slack message
+from app.slack_client import truncate
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+SENDGRID_SEND_URL = "https://api.sendgrid.com/v3/mail/send"
 
-def send_security_email(recipient: str, scan_result: dict) -> bool:
-    """
-    Sends a formatted security alert email matching the Slack message.
-    """
+# Alert emails are queued and sent by background workers, at most
+# EMAIL_RATE_PER_SEC per second across all workers
+EMAIL_WORKERS = int(os.getenv("EMAIL_WORKERS", "2"))
+EMAIL_RATE_PER_SEC = float(os.getenv("EMAIL_RATE_PER_SEC", "14"))
+_mail_queue: asyncio.Queue = asyncio.Queue()
+_mail_workers: list[asyncio.Task] = []
+_send_lock = asyncio.Lock()
+_next_send_at = 0.0
 
-    api_key = os.getenv("SENDGRID_API_KEY")
-    from_email = os.getenv("FROM_EMAIL")
+# Longest recommended fix copied into an email
+EMAIL_FIX_LIMIT = 1000
 
-    if not api_key or not from_email:
-        logger.error("❌ SendGrid not configured (missing env vars)")
-        return False
 
-    repo = scan_result.get("repo", "Unknown Repo")
-    branch = scan_result.get("branch", "Unknown Branch")
-    author = scan_result.get("author", "Unknown Author")
-    severity = scan_result.get("severity", "unknown").upper()
-    action = scan_result.get("action", "UNKNOWN")
-    incident = scan_result.get("incident", "Security Issue")
-    summary = scan_result.get("summary_en", "No summary available.")
-    issues = scan_result.get("issues_summary", "No issues listed.")
-    fix = scan_result.get("fix", "Refer to security guidelines.")
-    pr_url = scan_result.get("pr_url", "#")
-    now_utc = datetime.now(timezone.utc)
-    now_ist = now_utc + timedelta(hours=5, minutes=30)
-
-    time = (
-        f"{now_ist.strftime('%Y-%m-%d')} | "
-        f"{now_ist.strftime('%H:%M:%S IST')}"
+@lru_cache(maxsize=4)
+def _get_sendgrid_client(api_key: str) -> httpx.Client:
+    """
+    One keep-alive HTTP client per API key for the SendGrid v3 API.
+    (SendGridAPIClient opens a new urllib connection, and TLS session, per send.)
+    """
+    return httpx.Client(
+        headers={"Authorization": f"Bearer {api_key}"},
+        timeout=10,
     )
-        
-    subject = f"🚨 [ATF Sentinel] {action} — {repo}"
 
-    # ---------- TEXT VERSION ----------
-    text_content = f"""
+
+# Email bodies are parsed once; _build_message only fills in the fields
+
+# ---------- TEXT VERSION ----------
+TEXT_TEMPLATE = Template("""
 🚨 SECURITY ALERT — ATF Sentinel
 
-Repository : {repo}
-Branch     : {branch}
-Author     : {author}
-Severity   : {severity}
-Action     : {action}
-Time       : {time}
+Repository : $repo
+Branch     : $branch
+Author     : $author
+Severity   : $severity
+Action     : $action
+Time       : $time
 
 Incident:
-{incident}
+$incident
 
 Summary:
-{summary}
+$summary
 
 Issues:
-{issues}
+$issues
 
 Recommended Fix:
-{fix}
+$fix
 
 Pull Request:
-{pr_url}
+$pr_url
 
 — ATF Sentinel
-"""
+""")
 
-    # ---------- HTML VERSION ----------
-    html_content = f"""
+# ---------- HTML VERSION ----------
+# Line breaks and indentation are stripped once here, not sent with every
+# email (no line of the template breaks text, and $issues keeps its own)
+HTML_TEMPLATE = Template(re.sub(r"\n\s*", "", """
 <html>
 <body style="font-family: Arial, sans-serif; color: #333;">
   <h2 style="color:#d32f2f;">🚨 Security Alert — ATF Sentinel</h2>
 
   <table cellpadding="6">
-    <tr><td><b>Repository:</b></td><td>{repo}</td></tr>
-    <tr><td><b>Branch:</b></td><td>{branch}</td></tr>
-    <tr><td><b>Author:</b></td><td>{author}</td></tr>
-    <tr><td><b>Severity:</b></td><td style="color:red;"><b>{severity}</b></td></tr>
-    <tr><td><b>Action:</b></td><td><b>{action}</b></td></tr>
-    <tr><td><b>Time:</b></td><td>{time}</td></tr>
+    <tr><td><b>Repository:</b></td><td>$repo</td></tr>
+    <tr><td><b>Branch:</b></td><td>$branch</td></tr>
+    <tr><td><b>Author:</b></td><td>$author</td></tr>
+    <tr><td><b>Severity:</b></td><td style="color:red;"><b>$severity</b></td></tr>
+    <tr><td><b>Action:</b></td><td><b>$action</b></td></tr>
+    <tr><td><b>Time:</b></td><td>$time</td></tr>
   </table>
 
   <hr>
 
   <h3>Incident</h3>
-  <p>{incident}</p>
+  <p>$incident</p>
 
   <h3>Summary</h3>
-  <p>{summary}</p>
+  <p>$summary</p>
 
   <h3>Detected Issues</h3>
-  <pre style="background:#f5f5f5;padding:10px;border-radius:5px;">{issues}</pre>
+  <pre style="background:#f5f5f5;padding:10px;border-radius:5px;">$issues</pre>
 
   <h3>Recommended Fix</h3>
-  <p>{fix}</p>
+  <p>$fix</p>
 
   <p>
-    🔗 <a href="{pr_url}" target="_blank">View Pull Request</a>
+    🔗 <a href="$pr_url" target="_blank">View Pull Request</a>
   </p>
 
   <hr>
@@ -111,21 +115,125 @@ Pull Request:
   </p>
 </body>
 </html>
-"""
-
-    message = Mail(
-        from_email=from_email,
-        to_emails=recipient,
-        subject=subject,
-        plain_text_content=text_content,
-        html_content=html_content,
-    )
+"""))
+
 
+def _build_message(from_email: str, recipient: str, scan_result: dict) -> dict:
+    """Render the alert templates into a SendGrid v3 mail/send request body."""
+    action = scan_result.get("action", "UNKNOWN")
+    repo = scan_result.get("repo", "Unknown Repo")
+    now_ist = datetime.now(timezone.utc) + timedelta(hours=5, minutes=30)
+
+    fields = {
+        "repo": repo,
+        "branch": scan_result.get("branch", "Unknown Branch"),
+        "author": scan_result.get("author", "Unknown Author"),
+        "severity": scan_result.get("severity", "unknown").upper(),
+        "action": action,
+        "incident": scan_result.get("incident", "Security Issue"),
+        "summary": scan_result.get("summary_en", "No summary available."),
+        "issues": scan_result.get("issues_summary", "No issues listed."),
+        "fix": truncate(str(scan_result.get("fix", "Refer to security guidelines.")), EMAIL_FIX_LIMIT),
+        "pr_url": scan_result.get("pr_url", "#"),
+        "time": now_ist.strftime('%Y-%m-%d | %H:%M:%S IST'),
+    }
+    # Each value is escaped once for the HTML body; the text body uses it as-is
+    html_fields = {key: escape(str(value)) for key, value in fields.items()}
+
+    return {
+        "from": {"email": from_email},
+        "subject": f"🚨 [ATF Sentinel] {action} — {repo}",
+        "personalizations": [{"to": [{"email": recipient}]}],
+        "content": [
+            {"type": "text/plain", "value": TEXT_TEMPLATE.substitute(fields)},
+            {"type": "text/html", "value": HTML_TEMPLATE.substitute(html_fields)},
+        ],
+    }
+
+
+def _post_message(api_key: str, recipient: str, message: dict) -> bool:
     try:
-        sg = SendGridAPIClient(api_key)
-        response = sg.send(message)
+        response = _get_sendgrid_client(api_key).post(SENDGRID_SEND_URL, json=message)
+        response.raise_for_status()
         logger.info(f"📧 Email sent to {recipient} (status {response.status_code})")
         return True
     except Exception as e:
         logger.error(f"❌ Failed to send email: {e}")
         return False
+
+
+def send_security_email(recipient: str, scan_result: dict) -> bool:
+    """
+    Sends a formatted security alert email matching the Slack message.
+    """
+
+    api_key = os.getenv("SENDGRID_API_KEY")
+    from_email = os.getenv("FROM_EMAIL")
+
+    if not api_key or not from_email:
+        logger.error("❌ SendGrid not configured (missing env vars)")
+        return False
+
+    return _post_message(api_key, recipient, _build_message(from_email, recipient, scan_result))
+
+
+async def queue_security_email(recipient: str, scan_result: dict) -> bool:
+    """
+    Queue a security alert email for the background workers.
+    Sends inline (in a thread) when the workers are not running.
+    """
+    if not _mail_workers:
+        return await asyncio.to_thread(send_security_email, recipient, scan_result)
+
+    from_email = os.getenv("FROM_EMAIL")
+    if not os.getenv("SENDGRID_API_KEY") or not from_email:
+        logger.error("❌ SendGrid not configured (missing env vars)")
+        return False
+
+    _mail_queue.put_nowait((recipient, _build_message(from_email, recipient, scan_result)))
+    return True
+
+
+async def _wait_for_send_slot():
+    """Space sends 1 / EMAIL_RATE_PER_SEC seconds apart."""
+    global _next_send_at
+    async with _send_lock:
+        now = asyncio.get_running_loop().time()
+        if _next_send_at > now:
+            await asyncio.sleep(_next_send_at - now)
+        _next_send_at = max(now, _next_send_at) + 1 / EMAIL_RATE_PER_SEC
+
+
+async def _mail_worker(worker_id: int):
+    while True:
+        recipient, message = await _mail_queue.get()
+        try:
+            await _wait_for_send_slot()
+            await asyncio.to_thread(
+                _post_message, os.getenv("SENDGRID_API_KEY"), recipient, message
+            )
+        except Exception as e:
+            logger.error(f"❌ [Mail worker {worker_id}] Send failed: {e}")
+        finally:
+            _mail_queue.task_done()
+
+
+def start_email_workers():
+    """Start the email send workers (called on application startup)."""
+    for worker_id in range(EMAIL_WORKERS):
+        _mail_workers.append(asyncio.create_task(_mail_worker(worker_id)))
+    logger.info(f"📧 Started {EMAIL_WORKERS} email workers")
+
+
+async def stop_email_workers(timeout: float = 10):
+    """Give queued emails a chance to go out, then stop the workers."""
+    if not _mail_workers:
+        return
+    try:
+        await asyncio.wait_for(_mail_queue.join(), timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"⚠️ {_mail_queue.qsize()} queued email(s) not sent before shutdown")
+    for task in _mail_workers:
+        task.cancel()
+    await asyncio.gather(*_mail_workers, return_exceptions=True)
+    _mail_workers.clear()
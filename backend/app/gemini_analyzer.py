@@ -1,16 +1,57 @@
 # backend/app/gemini_analyzer.py
 
 import os
-import json
+import hashlib
 import logging
 import re
-from google import genai
-from google.genai import types
+import threading
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from cachetools import TTLCache
 from dotenv import load_dotenv
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# Compiled once; used on every Gemini response
+_FENCE_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+# Only a top-level "status" written as the answer's first key ends a stream early
+_STATUS_RE = re.compile(r'\s*\{\s*"status"\s*:\s*"(\w+)"')
+_FIRST_KEY_RE = re.compile(r'\s*\{\s*"(\w*)"')
+
+def _find_json_object(text: str):
+    """
+    Return the first balanced {...} object in text, or None.
+    Single pass; braces inside JSON strings are ignored.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '{':
+            depth += 1
+        elif ch == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
 def extract_json(text: str):
     """
     Extract JSON from response, handling Markdown code blocks.
@@ -20,72 +61,253 @@ def extract_json(text: str):
             raise ValueError("Empty response")
         
         cleaned = text.strip()
+        # JSON mode usually returns the bare object; parse it without any regex
+        if cleaned[:1] == '{' and cleaned[-1:] == '}':
+            try:
+                return orjson.loads(cleaned)
+            except orjson.JSONDecodeError:
+                pass
+
         if "```" in cleaned:
-            pattern = r"```(?:json)?\s*(\{.*?\})\s*```"
-            match = re.search(pattern, cleaned, re.DOTALL)
+            match = _FENCE_RE.search(cleaned)
             if match:
-                return json.loads(match.group(1))
+                return orjson.loads(match.group(1))
         
-        match = re.search(r'\{.*\}', cleaned, re.DOTALL)
+        match = _JSON_RE.search(cleaned)
         if match:
-            return json.loads(match.group(0))
+            try:
+                return orjson.loads(match.group(0))
+            except orjson.JSONDecodeError:
+                # Greedy match spanned several objects / trailing text
+                obj = _find_json_object(cleaned)
+                if obj is None:
+                    raise
+                return orjson.loads(obj)
             
-        return json.loads(cleaned)
+        return orjson.loads(cleaned)
     except Exception as e:
         logger.error(f"JSON Parsing failed: {e}")
         raise ValueError("Could not extract valid JSON from response")
 
+def _parse_strict_json(text: str):
+    """
+    Parse a JSON-mode response, which is the bare object.
+    Falls back to extract_json if the model wrapped it anyway.
+    """
+    try:
+        result = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return extract_json(text)
+    if not isinstance(result, dict):
+        return extract_json(text)
+    return result
+
+# Fixed part of the analysis prompt; only the engineer context and the diff vary
+ANALYSIS_PROMPT_PREFIX = """You are a Senior Security Engineer. Analyze the following code.
+
+RETURN JSON ONLY using this schema:
+{
+    "status": "clean" | "warning" | "critical",
+    "summary_en": "...",
+    "summary_jp": "...",
+    "action": "PASS" | "WARN" | "BLOCK",
+    "fix": "...",
+    "vulnerabilities": []
+}
+"""
+
+GEMINI_MODEL = "gemini-2.5-flash"
+
+# Diffs above this size (~15k tokens) keep only their head and tail
+MAX_DIFF_CHARS = 60_000
+TRUNCATION_MARKER = "\n...[TRUNCATED]...\n"
+
+# Diffs above this size are split per file and the parts analyzed in parallel
+SPLIT_DIFF_CHARS = 40_000
+SPLIT_MAX_WORKERS = 4
+FILE_HEADER = "\n--- File: "
+# Used to pick the worst part when merging split analyses
+STATUS_RANK = {"clean": 0, "warning": 1, "error": 1, "critical": 2}
+ACTION_RANK = {"PASS": 0, "WARN": 1, "BLOCK": 2}
+
+# Returned when the streamed answer opens with "status": "clean"
+CLEAN_RESULT = {
+    "status": "clean",
+    "summary_en": "No security issues found.",
+    "summary_jp": "セキュリティ上の問題は見つかりませんでした。",
+    "action": "PASS",
+    "fix": "N/A",
+    "vulnerabilities": []
+}
+
+# Returned when GEMINI_API_KEY is not set (local runs)
+NO_API_KEY_RESULT = {
+    "status": "clean",
+    "summary_en": "Simulation: No API key provided.",
+    "summary_jp": "シミュレーション：APIキーが設定されていません。",
+    "action": "PASS",
+    "fix": "N/A",
+    "vulnerabilities": []
+}
+
+# Returned when the Gemini call or parsing fails (never cached)
+ERROR_RESULT = {
+    "status": "error",
+    "summary_en": "AI Analysis Failed",
+    "summary_jp": "AI分析中にエラーが発生しました。",
+    "action": "WARN",
+    "fix": "Check logs",
+    "vulnerabilities": []
+}
+
+def _copy_result(result: dict) -> dict:
+    """Copy a result, vulnerabilities list included, so callers never share one."""
+    return {**result, "vulnerabilities": list(result.get("vulnerabilities") or [])}
+
+# Analyses of identical diffs (re-pushes, rebases) are reused for an hour
+_response_cache = TTLCache(maxsize=256, ttl=3600)
+_response_cache_lock = threading.Lock()
+
+def _response_cache_key(diff_text: str, engineer_context: str) -> str:
+    """Content hash of everything that goes into the prompt."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(engineer_context.encode('utf-8'))
+    h.update(b'\0')
+    h.update(diff_text.encode('utf-8'))
+    return h.hexdigest()
+
+@lru_cache(maxsize=4)
+def get_genai_client(api_key: str):
+    """Reuse one genai.Client (and its HTTP connection pool) per API key."""
+    # google.genai takes ~0.5s to import; load it on first use, not at startup
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+def truncate_diff(diff_text: str) -> str:
+    """Keep the first and last MAX_DIFF_CHARS // 2 characters of an oversized diff."""
+    if len(diff_text) <= MAX_DIFF_CHARS:
+        return diff_text
+    half = MAX_DIFF_CHARS // 2
+    logger.info(f"✂️ Truncating diff from {len(diff_text)} to {MAX_DIFF_CHARS} chars for Gemini")
+    return "".join((diff_text[:half], TRUNCATION_MARKER, diff_text[-half:]))
+
+def _stream_analysis(client, prompt: str, config):
+    """
+    Stream the model's JSON answer.
+
+    Returns the full response text, or None when the stream was stopped
+    early because the answer opened with "status": "clean". JSON mode does
+    not guarantee key order, so any other opening is read to the end.
+    """
+    parts = []
+    decided = False
+    stream = client.models.generate_content_stream(
+        model=GEMINI_MODEL,
+        contents=prompt,
+        config=config
+    )
+    try:
+        for chunk in stream:
+            if chunk.text:
+                parts.append(chunk.text)
+            if not decided:
+                text = "".join(parts)
+                match = _STATUS_RE.match(text)
+                if match:
+                    decided = True
+                    if match.group(1) == "clean":
+                        return None
+                elif text.strip() and not text.lstrip().startswith("{"):
+                    decided = True
+                else:
+                    first_key = _FIRST_KEY_RE.match(text)
+                    decided = first_key is not None and first_key.group(1) != "status"
+    finally:
+        stream.close()
+    return "".join(parts)
+
+def split_diff(diff_text: str) -> list:
+    """
+    Split a combined diff on its per-file headers and pack the files into
+    parts of at most SPLIT_DIFF_CHARS (a single larger file is its own part).
+    """
+    parts = []
+    current = []
+    current_chars = 0
+    for i, piece in enumerate(diff_text.split(FILE_HEADER)):
+        if i:
+            piece = FILE_HEADER + piece
+        if current and current_chars + len(piece) > SPLIT_DIFF_CHARS:
+            parts.append("".join(current))
+            current = []
+            current_chars = 0
+        current.append(piece)
+        current_chars += len(piece)
+    if current:
+        parts.append("".join(current))
+    return parts
+
+def merge_results(results: list) -> dict:
+    """Combine split analyses: the worst part's verdict, every part's findings."""
+    worst = max(results, key=lambda r: (
+        ACTION_RANK.get(r.get("action"), 1),
+        STATUS_RANK.get(r.get("status"), 1)
+    ))
+    merged = dict(worst)
+    merged["vulnerabilities"] = [v for r in results for v in r.get("vulnerabilities") or []]
+    return merged
+
 def analyze_code_with_gemini(diff_text, engineer_context=""):
     api_key = os.environ.get("GEMINI_API_KEY")
     if not api_key:
-        return {
-            "status": "clean",
-            "summary_en": "Simulation: No API key provided.",
-            "summary_jp": "シミュレーション：APIキーが設定されていません。",
-            "action": "PASS",
-            "fix": "N/A",
-            "vulnerabilities": []
-        }
+        return _copy_result(NO_API_KEY_RESULT)
+
+    if len(diff_text) > SPLIT_DIFF_CHARS:
+        parts = split_diff(diff_text)
+        if len(parts) > 1:
+            logger.info(f"🧩 Analyzing {len(diff_text)} char diff as {len(parts)} parallel parts")
+            with ThreadPoolExecutor(max_workers=min(SPLIT_MAX_WORKERS, len(parts))) as pool:
+                results = list(pool.map(
+                    lambda part: _analyze_diff(api_key, part, engineer_context), parts
+                ))
+            return merge_results(results)
+
+    return _analyze_diff(api_key, diff_text, engineer_context)
+
+def _analyze_diff(api_key: str, diff_text: str, engineer_context: str) -> dict:
+    from google.genai import types
+
+    diff_text = truncate_diff(diff_text)
+    cache_key = _response_cache_key(diff_text, engineer_context)
+    with _response_cache_lock:
+        cached = _response_cache.get(cache_key)
+    if cached is not None:
+        logger.info("♻️ Reusing cached Gemini analysis for identical diff")
+        return _copy_result(cached)
 
     try:
-        client = genai.Client(api_key=api_key)
+        client = get_genai_client(api_key)
 
-        prompt = f"""
-        You are a Senior Security Engineer. Analyze the following code.
-        
-        {engineer_context}
-        
-        RETURN JSON ONLY using this schema:
-        {{
-            "status": "clean" | "warning" | "critical",
-            "summary_en": "...",
-            "summary_jp": "...",
-            "action": "PASS" | "WARN" | "BLOCK",
-            "fix": "...",
-            "vulnerabilities": []
-        }}
-
-        CODE:
-        {diff_text}
-        """
-
-        response = client.models.generate_content(
-            model="gemini-2.5-flash", 
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                response_mime_type='application/json'
-            )
+        # Only per-request data goes in contents; the fixed prefix is sent
+        # as an identical system instruction on every call
+        prompt = "".join((engineer_context, "\n\nCODE:\n", diff_text, "\n"))
+        config = types.GenerateContentConfig(
+            system_instruction=ANALYSIS_PROMPT_PREFIX,
+            response_mime_type='application/json'
         )
 
-        return extract_json(response.text)
+        text = _stream_analysis(client, prompt, config)
+        if text is None:
+            logger.info("✅ Gemini reported clean, stopped streaming early")
+            result = _copy_result(CLEAN_RESULT)
+        else:
+            result = _parse_strict_json(text)
+        # Never cache failed analyses
+        if isinstance(result, dict) and result.get("status") != "error":
+            with _response_cache_lock:
+                _response_cache[cache_key] = _copy_result(result)
+        return result
 
     except Exception as e:
         logger.error(f"GenAI Error: {e}")
-        return {
-            "status": "error",
-            "summary_en": "AI Analysis Failed",
-            "summary_jp": "AI分析中にエラーが発生しました。",
-            "action": "WARN",
-            "fix": "Check logs",
-            "vulnerabilities": []
-        }
\ No newline at end of file
+        return _copy_result(ERROR_RESULT)
\ No newline at end of file
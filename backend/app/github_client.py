@@ -6,14 +6,147 @@ Handles all interactions with GitHub API including:
 - Setting commit status
 Author: ANIRUDH S J
 """
-from github import Github
+import threading
+import time
+from functools import lru_cache
+from cachetools import LRUCache, TTLCache
+from github import Auth, Github
+from github.File import File
+from github.PaginatedList import PaginatedList
 from github.GithubException import GithubException
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Keep-alive connections shared by concurrent scans (requests' default is 10)
+GITHUB_POOL_SIZE = 20
+
+# GitHub's maximum page size; PyGithub defaults to 30 (e.g. PR files)
+GITHUB_PER_PAGE = 100
+
+# Max number of Repository objects kept for ETag revalidation
+REPO_CACHE_SIZE = 128
+
+# Max number of PullRequest objects kept for ETag revalidation
+PR_CACHE_SIZE = 256
+
+# PR file listings keyed by (repo, PR, head SHA); a new push changes the SHA
+PR_FILES_CACHE_SIZE = 512
+PR_FILES_CACHE_TTL = 60
+# Listings whose patches add up to more characters than this are streamed, not cached
+PR_FILES_CACHE_MAX_CHARS = 1024 * 1024
+
+# Log the remaining rate limit at most this often (seconds)
+RATE_LIMIT_LOG_INTERVAL = 60
+
+
+# File classification tables for GitHubClient._is_text_file
+# Programming languages
+TEXT_EXTENSIONS = frozenset({
+    # Python
+    '.py', '.pyw', '.pyx', '.pxd', '.pxi',
+
+    # JavaScript/TypeScript
+    '.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs',
+
+    # Java/Kotlin/Scala
+    '.java', '.kt', '.kts', '.scala',
+
+    # C/C++
+    '.c', '.cpp', '.cc', '.cxx', '.h', '.hpp', '.hxx',
+
+    # C#/.NET
+    '.cs', '.vb', '.fs',
+
+    # Go
+    '.go',
+
+    # Rust
+    '.rs',
+
+    # Ruby
+    '.rb', '.rake', '.gemspec',
+
+    # PHP
+    '.php', '.phtml', '.php3', '.php4', '.php5', '.phps',
+
+    # Swift
+    '.swift',
+
+    # Objective-C
+    '.m', '.mm',
+
+    # R
+    '.r',
+
+    # Web
+    '.html', '.htm', '.xhtml', '.css', '.scss', '.sass', '.less',
+    '.vue', '.svelte', '.astro',
+
+    # Config/Data
+    '.json', '.yaml', '.yml', '.xml', '.toml', '.ini', '.conf', '.config',
+    '.env', '.properties', '.cfg',
+
+    # Scripts
+    '.sh', '.bash', '.zsh', '.fish', '.ps1', '.bat', '.cmd',
+
+    # Documentation
+    '.md', '.markdown', '.txt', '.rst', '.asciidoc', '.adoc',
+
+    # SQL
+    '.sql', '.pgsql', '.mysql', '.plsql',
+
+    # GraphQL
+    '.graphql', '.gql',
+
+    # Terraform
+    '.tf', '.tfvars',
+
+    # Docker
+    '.dockerfile',
+})
+
+# Text files that usually have no extension
+TEXT_BASENAMES = frozenset({
+    'dockerfile', 'makefile', 'rakefile', 'gemfile',
+    'readme', 'license', 'changelog', 'contributing',
+    'jenkinsfile', 'vagrantfile', 'procfile'
+})
+
+# Known binary/media extensions (skipped)
+BINARY_EXTENSIONS = frozenset({
+    # Images
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.ico', '.webp',
+    # Videos
+    '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm',
+    # Audio
+    '.mp3', '.wav', '.flac', '.aac', '.ogg',
+    # Archives
+    '.zip', '.tar', '.gz', '.bz2', '.7z', '.rar',
+    # Executables
+    '.exe', '.dll', '.so', '.dylib', '.bin',
+    # Documents
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    # Fonts
+    '.ttf', '.otf', '.woff', '.woff2', '.eot',
+    # Other
+    '.pyc', '.pyo', '.class', '.o', '.a', '.jar', '.war'
+})
+
+# Most files in real PRs; checked on the raw name before any other work
+COMMON_TEXT_SUFFIXES = (
+    '.py', '.ts', '.js', '.tsx', '.md', '.json', '.yaml', '.yml',
+    '.go', '.java', '.html', '.css',
+)
+
+# Extension -> should scan, merged into one dict so each file costs one probe.
+# Text wins if an extension were ever listed in both.
+EXTENSION_IS_TEXT = {
+    **dict.fromkeys(BINARY_EXTENSIONS, False),
+    **dict.fromkeys(TEXT_EXTENSIONS, True),
+}
+
 
 class GitHubClient:
     """
@@ -28,25 +161,75 @@ class GitHubClient:
         Args:
             token: GitHub Personal Access Token with repo permissions
             
+        No API calls are made here; see verify().
+        
         Raises:
             ValueError: If token is empty or None
-            GithubException: If authentication fails
         """
         if not token:
             raise ValueError("GitHub token is required")
         
-        self.gh = Github(token)
+        # One pooled, retrying HTTPS session for every call made through this client.
+        # Reads aren't throttled; writes keep PyGithub's 1s spacing (secondary rate limits).
+        self.gh = Github(
+            auth=Auth.Token(token),
+            pool_size=GITHUB_POOL_SIZE,
+            per_page=GITHUB_PER_PAGE,
+            seconds_between_requests=None,
+        )
         self.token = token
         
-        # Verify token is valid by getting authenticated user
+        # repo_name -> Repository, revalidated with conditional requests on each use
+        self._repo_cache = LRUCache(maxsize=REPO_CACHE_SIZE)
+        self._repo_cache_lock = threading.Lock()
+        
+        # (repo_name, pr_number) -> PullRequest, likewise
+        self._pr_cache = LRUCache(maxsize=PR_CACHE_SIZE)
+        self._pr_cache_lock = threading.Lock()
+        
+        self._pr_files_cache = TTLCache(maxsize=PR_FILES_CACHE_SIZE, ttl=PR_FILES_CACHE_TTL)
+        self._pr_files_cache_lock = threading.Lock()
+        
+        self._user = None
+        self._last_rate_limit_log = 0.0
+    
+    @property
+    def user(self):
+        """
+        Authenticated user, reused across requests.
+        PyGithub fetches it on the first attribute access, once.
+        """
+        if self._user is None:
+            self._user = self.gh.get_user()
+        return self._user
+    
+    def verify(self) -> None:
+        """
+        Verify the token by fetching the authenticated user (one API call).
+        Meant for startup/diagnostics, not for every webhook.
+        
+        Raises:
+            GithubException: If authentication fails
+        """
         try:
-            user = self.gh.get_user()
-            logger.info(f"✅ GitHub client initialized for user: {user.login}")
-            logger.info(f"   Rate limit: {self.gh.get_rate_limit().core.remaining}/5000")
+            logger.info(f"✅ GitHub client authenticated as user: {self.user.login}")
+            self._log_rate_limit()
         except GithubException as e:
             logger.error(f"❌ Failed to authenticate with GitHub: {e}")
             raise
     
+    def _log_rate_limit(self) -> None:
+        """Log the rate limit seen on the last response (no extra request)."""
+        self._last_rate_limit_log = time.monotonic()
+        remaining, limit = self.gh.requester.rate_limiting
+        if limit >= 0:
+            logger.info(f"   Rate limit: {remaining}/{limit}")
+    
+    def _maybe_log_rate_limit(self) -> None:
+        """_log_rate_limit, at most once per RATE_LIMIT_LOG_INTERVAL."""
+        if time.monotonic() - self._last_rate_limit_log > RATE_LIMIT_LOG_INTERVAL:
+            self._log_rate_limit()
+    
     def get_repo(self, repo_name: str):
         """
         Get repository object
@@ -61,13 +244,53 @@ class GitHubClient:
             GithubException: If repo doesn't exist or no access
         """
         try:
+            with self._repo_cache_lock:
+                repo = self._repo_cache.get(repo_name)
+            if repo is not None:
+                # Conditional GET with the stored ETag: an unchanged repo returns
+                # 304 (no body, not counted against the rate limit)
+                changed = repo.update()
+                logger.debug(f"   Repository cache hit: {repo_name} (changed={changed})")
+                self._maybe_log_rate_limit()
+                return repo
+            
             repo = self.gh.get_repo(repo_name)
+            with self._repo_cache_lock:
+                self._repo_cache[repo_name] = repo
             logger.info(f"✅ Accessed repository: {repo_name}")
+            self._maybe_log_rate_limit()
             return repo
         except GithubException as e:
             logger.error(f"❌ Failed to access repo {repo_name}: {e}")
             raise
     
+    def _get_pull(self, repo_name: str, pr_number: int):
+        """
+        Get a PullRequest object. A cached one is revalidated with its ETag
+        on every call, so head.sha is current right after a push (an
+        unchanged PR costs a 304, which doesn't count against the rate limit).
+        """
+        key = (repo_name, pr_number)
+        with self._pr_cache_lock:
+            pr = self._pr_cache.get(key)
+        if pr is not None:
+            changed = pr.update()
+            logger.debug(f"   Pull request cache hit: {repo_name}#{pr_number} (changed={changed})")
+            return pr
+        
+        pr = self.get_repo(repo_name).get_pull(pr_number)
+        with self._pr_cache_lock:
+            self._pr_cache[key] = pr
+        return pr
+    
+    def _cached_pr_files(self, repo_name: str, pr_number: int, head_sha: str) -> Optional[List[Dict]]:
+        with self._pr_files_cache_lock:
+            cached = self._pr_files_cache.get((repo_name, pr_number, head_sha))
+        if cached is not None:
+            logger.info(f"♻️ Reusing file list for PR #{pr_number} @ {head_sha[:7]}")
+            return list(cached)
+        return None
+    
     # Use this to fetch PR metadata before deeper operations like file scanning or status updates
     def get_pr_details(self, repo_name: str, pr_number: int) -> Dict:
         """
@@ -81,8 +304,7 @@ class GitHubClient:
             Dictionary with PR details
         """
         try:
-            repo = self.get_repo(repo_name)
-            pr = repo.get_pull(pr_number)
+            pr = self._get_pull(repo_name, pr_number)
             details = {
                 'number': pr.number,
                 'title': pr.title,
@@ -105,7 +327,7 @@ class GitHubClient:
             raise
     
     # Critical for scanning code changes; uses PR details for context
-    def get_pr_files(self, repo_name: str, pr_number: int) -> List[Dict]:
+    def get_pr_files(self, repo_name: str, pr_number: int, head_sha: Optional[str] = None) -> List[Dict]:
         """
         Get list of files changed in a Pull Request with their diffs
         
@@ -114,6 +336,9 @@ class GitHubClient:
         Args:
             repo_name: Full repo name (e.g., 'myorg/myrepo')
             pr_number: Pull request number
+            head_sha: PR head commit, if known; lets a cached listing be
+                returned without any API call, and otherwise skips the
+                repo and PR lookups
             
         Returns:
             List of dictionaries containing file information:
@@ -134,17 +359,49 @@ class GitHubClient:
         Raises:
             GithubException: If PR doesn't exist or no access
         """
+        return list(self.iter_pr_files(repo_name, pr_number, head_sha))
+    
+    def iter_pr_files(self, repo_name: str, pr_number: int, head_sha: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Like get_pr_files, but yields each text file as its page arrives,
+        so the caller can scan while later pages are still being fetched.
+        
+        Listings up to PR_FILES_CACHE_MAX_CHARS of patch text are cached once
+        fully read; larger ones are only ever held one page at a time.
+        """
+        if head_sha:
+            cached = self._cached_pr_files(repo_name, pr_number, head_sha)
+            if cached is not None:
+                yield from cached
+                return
+        
         try:
-            repo = self.get_repo(repo_name)
-            pr = repo.get_pull(pr_number)
-            
-            logger.info(f"📁 Fetching files for PR #{pr_number}: {pr.title}")
-            
+            if head_sha:
+                # The head SHA is all we need from the PR, so list the files
+                # straight away instead of fetching the repo and the PR first
+                files = PaginatedList(
+                    File, self.gh.requester, f"/repos/{repo_name}/pulls/{pr_number}/files", None
+                )
+            else:
+                pr = self._get_pull(repo_name, pr_number)
+                head_sha = pr.head.sha
+                # The (revalidated) PR tells us its head; the listing may be cached
+                cached = self._cached_pr_files(repo_name, pr_number, head_sha)
+                if cached is not None:
+                    yield from cached
+                    return
+                files = pr.get_files()
+            
+            logger.info(f"📁 Fetching files for PR #{pr_number} in {repo_name}")
+            
+            # None once the listing is too large to cache
             files_changed = []
+            patch_chars = 0
+            text_files = 0
             total_files = 0
             skipped_files = 0
             
-            for file in pr.get_files():
+            for file in files:
                 total_files += 1
                 
                 # Only process text files (skip binaries, images, etc.)
@@ -159,30 +416,46 @@ class GitHubClient:
                         'blob_url': file.blob_url,
                         'raw_url': file.raw_url
                     }
-                    files_changed.append(file_info)
+                    text_files += 1
+                    if files_changed is not None:
+                        patch_chars += len(file_info['patch'] or '')
+                        if patch_chars <= PR_FILES_CACHE_MAX_CHARS:
+                            files_changed.append(file_info)
+                        else:
+                            files_changed = None
                     logger.debug(f"   ✅ {file.filename} ({file.status})")
+                    yield file_info
                 else:
                     skipped_files += 1
                     logger.debug(f"   ⏭️  Skipping binary: {file.filename}")
             
-            logger.info(f"✅ Found {len(files_changed)} text files to scan "
+            logger.info(f"✅ Found {text_files} text files to scan "
                        f"({skipped_files} binaries skipped out of {total_files} total)")
             
-            return files_changed
+            if files_changed is not None:
+                with self._pr_files_cache_lock:
+                    self._pr_files_cache[(repo_name, pr_number, head_sha)] = files_changed
             
         except GithubException as e:
             logger.error(f"❌ Failed to fetch PR files: {e}")
             raise
     
     # Use this to fetch gmail from PRs
-    def get_pr_author_email(self, repo_name: str, pr_number: int) -> Optional[str]:
+    def get_pr_author_email(self, repo_name: str, pr_number: int, head_sha: Optional[str] = None) -> Optional[str]:
         """
         Retrieves the email address from the most recent commit in the PR.
         This is the most reliable way to get the author's email.
+        
+        With head_sha (the PR's latest commit) this is a single git-commit
+        GET instead of fetching the PR and paging through its commits.
         """
         try:
-            repo = self.get_repo(repo_name)
-            pr = repo.get_pull(pr_number)
+            if head_sha:
+                # Lazy repo: builds the URL without fetching the repository
+                repo = self.gh.get_repo(repo_name, lazy=True)
+                return repo.get_git_commit(head_sha).author.email
+            
+            pr = self._get_pull(repo_name, pr_number)
 
             # Get the latest commit
             commits = pr.get_commits()
@@ -210,9 +483,13 @@ class GitHubClient:
             True if successful, False otherwise
         """
         try:
-            repo = self.get_repo(repo_name)
-            pr = repo.get_pull(pr_number)
-            pr.create_issue_comment(comment)
+            # PR comments are issue comments; POST directly instead of
+            # fetching the repo and the PR first
+            self.gh.requester.requestJsonAndCheck(
+                "POST",
+                f"/repos/{repo_name}/issues/{pr_number}/comments",
+                input={"body": comment}
+            )
             logger.info(f"✅ Posted comment to PR #{pr_number} in {repo_name}")
             return True
         except GithubException as e:
@@ -249,8 +526,6 @@ class GitHubClient:
             return False
             
         try:
-            repo = self.get_repo(repo_name)
-            commit = repo.get_commit(sha)
             # Truncate description if too long (GitHub limit is 140 chars)
             description = description[:140] if len(description) > 140 else description
             # Set the status - only pass target_url if it's not None
@@ -261,7 +536,13 @@ class GitHubClient:
             }
             if target_url:
                 status_params['target_url'] = target_url
-            commit.create_status(**status_params)
+            # POST the status directly; going through repo.get_commit(sha)
+            # would first GET the repo and the full commit (with its files)
+            self.gh.requester.requestJsonAndCheck(
+                "POST",
+                f"/repos/{repo_name}/statuses/{sha}",
+                input=status_params
+            )
             emoji = {
                 'success': '✅',
                 'failure': '❌',
@@ -278,6 +559,7 @@ class GitHubClient:
             return False
     
     @staticmethod
+    @lru_cache(maxsize=4096)
     def _is_text_file(filename: str) -> bool:
         """
         Check if file is a text file (should be scanned) vs binary (skip)
@@ -287,307 +569,23 @@ class GitHubClient:
             
         Returns:
             True if text file that should be scanned, False otherwise
-        """
-        # Programming languages
-        text_extensions = {
-            # Python
-            '.py', '.pyw', '.pyx', '.pxd', '.pxi',
-            
-            # JavaScript/TypeScript
-            '.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs',
-            
-            # Java/Kotlin/Scala
-            '.java', '.kt', '.kts', '.scala',
-            
-            # C/C++
-            '.c', '.cpp', '.cc', '.cxx', '.h', '.hpp', '.hxx',
-            
-            # C#/.NET
-            '.cs', '.vb', '.fs',
-            
-            # Go
-            '.go',
-            
-            # Rust
-            '.rs',
-            
-            # Ruby
-            '.rb', '.rake', '.gemspec',
-            
-            # PHP
-            '.php', '.phtml', '.php3', '.php4', '.php5', '.phps',
-            
-            # Swift
-            '.swift',
-            
-            # Objective-C
-            '.m', '.mm',
-            
-            # R
-            '.r', '.R',
-            
-            # Web
-            '.html', '.htm', '.xhtml', '.css', '.scss', '.sass', '.less',
-            '.vue', '.svelte', '.astro',
-            
-            # Config/Data
-            '.json', '.yaml', '.yml', '.xml', '.toml', '.ini', '.conf', '.config',
-            '.env', '.properties', '.cfg',
-            
-            # Scripts
-            '.sh', '.bash', '.zsh', '.fish', '.ps1', '.bat', '.cmd',
-            
-            # Documentation
-            '.md', '.markdown', '.txt', '.rst', '.asciidoc', '.adoc',
-            
-            # SQL
-            '.sql', '.pgsql', '.mysql', '.plsql',
-            
-            # GraphQL
-            '.graphql', '.gql',
-            
-            # Terraform
-            '.tf', '.tfvars',
-            
-            # Docker
-            '.dockerfile',
-        }
         
-        filename_lower = filename.lower()
+        Memoized by path: the same files recur across pushes to a PR.
+        """
+        if filename.endswith(COMMON_TEXT_SUFFIXES):
+            return True
         
-        # Check extension
-        for ext in text_extensions:
-            if filename_lower.endswith(ext):
-                return True
+        basename = filename.rsplit('/', 1)[-1].lower()
         
         # Check exact matches (files without extensions)
-        basename = filename.split('/')[-1].lower()
-        text_basenames = {
-            'dockerfile', 'makefile', 'rakefile', 'gemfile',
-            'readme', 'license', 'changelog', 'contributing',
-            'jenkinsfile', 'vagrantfile', 'procfile'
-        }
-        
-        if basename in text_basenames:
+        if basename in TEXT_BASENAMES:
             return True
         
-        # Skip known binary/media extensions
-        binary_extensions = {
-            # Images
-            '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg', '.ico', '.webp',
-            # Videos
-            '.mp4', '.avi', '.mov', '.wmv', '.flv', '.webm',
-            # Audio
-            '.mp3', '.wav', '.flac', '.aac', '.ogg',
-            # Archives
-            '.zip', '.tar', '.gz', '.bz2', '.7z', '.rar',
-            # Executables
-            '.exe', '.dll', '.so', '.dylib', '.bin',
-            # Documents
-            '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
-            # Fonts
-            '.ttf', '.otf', '.woff', '.woff2', '.eot',
-            # Other
-            '.pyc', '.pyo', '.class', '.o', '.a', '.jar', '.war'
-        }
-        
-        for ext in binary_extensions:
-            if filename_lower.endswith(ext):
-                return False
-        
-        # Default to True for unknown extensions (safer to scan)
-        return True
-
-
-# Helper function for testing and verification
-def display_repo_info(repo) -> None:
-    """
-    Display comprehensive repository information
-    
-    Helper function to show repo metadata in a formatted way.
-    Useful for testing and debugging.
-    
-    Args:
-        repo: PyGithub Repository object
-    """
-    print(f"\n📦 Repository Information:")
-    print(f"   {'='*56}")
-    print(f"   Name:        {repo.name}")
-    print(f"   Full Name:   {repo.full_name}")
-    print(f"   Owner:       {repo.owner.login}")
-    print(f"   Private:     {repo.private}")
-    print(f"   Description: {repo.description or 'No description'}")
-    print(f"   Language:    {repo.language or 'Not specified'}")
-    print(f"   Stars:       {repo.stargazers_count:,}")
-    print(f"   Forks:       {repo.forks_count:,}")
-    print(f"   Open Issues: {repo.open_issues_count:,}")
-    print(f"   Created:     {repo.created_at.strftime('%Y-%m-%d')}")
-    print(f"   Updated:     {repo.updated_at.strftime('%Y-%m-%d')}")
-    print(f"   URL:         {repo.html_url}")
-    print(f"   {'='*56}\n")
-
-
-# Test function for PR file fetching
-def test_pr_file_fetching():
-    """
-    Test PR file fetching functionality
-    """
-    import os
-    
-    print("\n🧪 Testing PR File Fetching\n")
-    print("="*60)
-    
-    # Get token
-    token = os.getenv('GITHUB_TOKEN')
-    if not token:
-        print("Enter your GitHub Personal Access Token:")
-        token = input().strip()
-    
-    if not token:
-        print("❌ No token provided")
-        return False
-    
-    try:
-        # Initialize client
-        print("\n1️⃣  Initializing GitHub client...")
-        client = GitHubClient(token)
-        print("   ✅ Client initialized\n")
-        
-        # Get PR details from user
-        print("2️⃣  Enter Pull Request details to test:")
-        print("   " + "-"*56)
-        repo_name = input("   Repository (owner/repo): ").strip()
-        
-        if not repo_name:
-            print("\n   Using default: octocat/Hello-World")
-            repo_name = "octocat/Hello-World"
-        
-        pr_number = input("   PR number: ").strip()
-        
-        if not pr_number:
-            print("   ❌ PR number is required")
-            return False
-        
-        pr_number = int(pr_number)
-        print()
-        
-        # Fetch PR files
-        print(f"3️⃣  Fetching files from PR #{pr_number}...")
-        print("   " + "-"*56)
-        files = client.get_pr_files(repo_name, pr_number)
-        
-        if not files:
-            print("   ⚠️  No text files found in this PR")
-            print("   (PR may contain only binary files or be empty)\n")
+        # Only the last suffix matters (e.g. '.tar.gz' -> '.gz')
+        dot = basename.rfind('.')
+        if dot < 0:
             return True
+        ext = basename[dot:]
         
-        print(f"   ✅ Found {len(files)} text files\n")
-        
-        # Display file details
-        print("4️⃣  File Details:")
-        print("   " + "-"*56)
-        
-        for i, file in enumerate(files, 1):
-            status_emoji = {
-                'added': '🆕',
-                'modified': '📝',
-                'removed': '🗑️',
-                'renamed': '🔄'
-            }.get(file['status'], '📄')
-            
-            print(f"\n   {status_emoji} File #{i}: {file['filename']}")
-            print(f"      Status:    {file['status']}")
-            print(f"      Changes:   +{file['additions']} -{file['deletions']} (~{file['changes']} lines)")
-            print(f"      Blob URL:  {file['blob_url']}")
-            
-            # Show diff preview
-            if file['patch']:
-                patch_lines = file['patch'].split('\n')
-                print(f"      Diff preview ({len(patch_lines)} lines):")
-                # Show first 5 lines of diff
-                for line in patch_lines[:5]:
-                    preview = line[:70] + '...' if len(line) > 70 else line
-                    print(f"         {preview}")
-                if len(patch_lines) > 5:
-                    print(f"         ... ({len(patch_lines) - 5} more lines)")
-            else:
-                print(f"      Diff:      (No patch available)")
-        
-        print()
-        
-        # Statistics
-        print("5️⃣  Statistics:")
-        print("   " + "-"*56)
-        
-        total_additions = sum(f['additions'] for f in files)
-        total_deletions = sum(f['deletions'] for f in files)
-        total_changes = sum(f['changes'] for f in files)
-        
-        status_counts = {}
-        for file in files:
-            status = file['status']
-            status_counts[status] = status_counts.get(status, 0) + 1
-        
-        print(f"   Total files:     {len(files)}")
-        print(f"   Total additions: +{total_additions}")
-        print(f"   Total deletions: -{total_deletions}")
-        print(f"   Total changes:   ~{total_changes} lines")
-        print(f"\n   By status:")
-        for status, count in sorted(status_counts.items()):
-            emoji = {
-                'added': '🆕',
-                'modified': '📝',
-                'removed': '🗑️',
-                'renamed': '🔄'
-            }.get(status, '📄')
-            print(f"      {emoji} {status.capitalize()}: {count}")
-        
-        print()
-        
-        # Test data structure
-        print("6️⃣  Verifying data structure...")
-        print("   " + "-"*56)
-        
-        required_keys = ['filename', 'status', 'additions', 'deletions', 
-                        'changes', 'patch', 'blob_url', 'raw_url']
-        
-        for file in files:
-            for key in required_keys:
-                assert key in file, f"Missing key: {key}"
-        
-        print(f"   ✅ All {len(required_keys)} required fields present")
-        print(f"   ✅ Data structure validation passed\n")
-        
-        # Summary
-        print("="*60)
-        print("✅ PR File Fetching Test Passed!\n")
-        print("📊 Summary:")
-        print(f"   • Repository:  {repo_name}")
-        print(f"   • PR Number:   #{pr_number}")
-        print(f"   • Files found: {len(files)}")
-        print(f"   • Changes:     +{total_additions} -{total_deletions}")
-        print()
-        
-        return True
-        
-    except ValueError as e:
-        print(f"\n❌ Invalid input: {e}\n")
-        return False
-    except GithubException as e:
-        print(f"\n❌ GitHub error: {e}\n")
-        print("   Possible reasons:")
-        print("   • PR doesn't exist")
-        print("   • Repository is private and token lacks access")
-        print("   • Invalid repository name format")
-        print()
-        return False
-    except Exception as e:
-        print(f"\n❌ Test failed: {e}\n")
-        import traceback
-        traceback.print_exc()
-        return False
-
-
-if __name__ == "__main__":
-    success = test_pr_file_fetching()
-    exit(0 if success else 1)
\ No newline at end of file
+        # Default to True for unknown extensions (safer to scan)
+        return EXTENSION_IS_TEXT.get(ext, True)
@@ -5,23 +5,31 @@ Author: ANIRUDH S J
 """
 from fastapi import FastAPI, Request, Header, HTTPException, Depends, Query, BackgroundTasks, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ValidationError
 from sqlalchemy.orm import Session
 from sqlalchemy import func, desc
 import sqlalchemy
 from datetime import datetime, timedelta
+import asyncio
 import hmac
 import hashlib
 import logging
-import json
+import os
 import uuid
 from typing import Optional, List
+from cachetools import TTLCache
 
 from app.config import config
 from app.github_client import GitHubClient
 from app.scanner import run_security_scan
 from app.reporter import report_security_issue
-from app.database import get_db, init_engine, create_tables, check_database_health
+from app.slack_client import close_http_client
+from app.email_client import start_email_workers, stop_email_workers
+from app.database import (
+    get_db, init_engine, create_tables, check_database_health,
+    ScopedSession, begin_request_scope, end_request_scope,
+)
 from app.models import (
     ScanResult, SecurityIssue, Repository, Engineer, DailyMetrics,
     ScanAction, Severity
@@ -40,7 +48,9 @@ app = FastAPI(
     description="Automated security scanning for GitHub Pull Requests",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # Responses are serialized with orjson instead of the stdlib json module
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS for frontend
@@ -63,6 +73,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def db_session_scope(request: Request, call_next):
+    """Give each request one database session and close it after the response"""
+    token = begin_request_scope()
+    try:
+        return await call_next(request)
+    finally:
+        if ScopedSession.registry.has():
+            await asyncio.to_thread(ScopedSession.remove)
+        end_request_scope(token)
+
+
+# Load the core secrets in parallel rather than one by one on first use
+config.prefetch()
+
 # Initialize GitHub client
 try:
     github_client = GitHubClient(config.github_token)
@@ -72,11 +98,35 @@ except Exception as e:
     github_client = None
 
 
+def refresh_github_client() -> None:
+    """Rebuild the GitHub client once config reports a rotated token."""
+    global github_client
+    if github_client is None:
+        return
+    token = config.github_token
+    if not token or token == github_client.token:
+        return
+    try:
+        github_client = GitHubClient(token)
+        logger.info("🔄 GitHub client rebuilt with the rotated token")
+    except Exception as e:
+        logger.error(f"❌ Failed to rebuild GitHub client with the rotated token: {e}")
+
+
 @app.on_event("startup")
 async def startup_event():
     """Run on application startup"""
+    global github_client
     logger.info("🚀 ATF Sentinel starting up...")
     
+    # Verify the GitHub token once per process (not per webhook)
+    if github_client is not None:
+        try:
+            github_client.verify()
+        except Exception as e:
+            logger.error(f"❌ GitHub authentication failed: {e}")
+            github_client = None
+    
     # Initialize database
     try:
         init_engine()
@@ -88,7 +138,7 @@ async def startup_event():
     # Initialize allowed repositories in database
     db = None
     try:
-        db = next(get_db())
+        db = get_db()
         for repo_pattern in config.allowed_repos:
             # Handle wildcard patterns (e.g., "org/*")
             if repo_pattern.endswith('/*'):
@@ -134,9 +184,26 @@ async def startup_event():
         logger.warning("⚠️ Some configuration issues detected")
     
     logger.info(f"📋 Allowed repos: {config.allowed_repos}")
+    
+    # Start the PR scan workers
+    for worker_id in range(MAX_CONCURRENT_SCANS):
+        _scan_workers.append(asyncio.create_task(scan_worker(worker_id)))
+    logger.info(f"👷 Started {MAX_CONCURRENT_SCANS} scan workers")
+    start_email_workers()
     logger.info("✅ Application ready to receive webhooks")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop scan workers and release pooled outbound connections"""
+    for task in _scan_workers:
+        task.cancel()
+    await asyncio.gather(*_scan_workers, return_exceptions=True)
+    _scan_workers.clear()
+    await stop_email_workers()
+    await close_http_client()
+
+
 @app.get("/")
 async def root():
     """Root endpoint - basic service info"""
@@ -159,13 +226,17 @@ async def root():
 async def health_check():
     """Health check endpoint for monitoring"""
     
-    db_health = check_database_health()
+    # SELECT 1 (at most once per DB_HEALTH_TTL) runs off the event loop
+    db_health = await asyncio.to_thread(check_database_health)
+    secrets_loaded, allowed_repos_count = await asyncio.to_thread(
+        lambda: (bool(config.github_token), len(config.allowed_repos))
+    )
     
     health_status = {
         "status": "healthy",
         "github_client": github_client is not None,
-        "secrets_loaded": bool(config.github_token),
-        "allowed_repos": len(config.allowed_repos),
+        "secrets_loaded": secrets_loaded,
+        "allowed_repos": allowed_repos_count,
         "database": db_health,
         "version": "2.0.0"
     }
@@ -173,7 +244,7 @@ async def health_check():
     # Check if all critical components are working
     if not all([health_status["github_client"], health_status["secrets_loaded"]]):
         health_status["status"] = "degraded"
-        return JSONResponse(status_code=503, content=health_status)
+        return ORJSONResponse(status_code=503, content=health_status)
     
     if db_health.get("status") != "healthy":
         health_status["status"] = "degraded"
@@ -617,31 +688,99 @@ async def get_issue_patterns(
 # WEBHOOK HANDLERS
 # =============================================================================
 
-def verify_github_signature(payload: bytes, signature: Optional[str]) -> bool:
+class WebhookUser(BaseModel):
+    login: str
+
+
+class WebhookRepository(BaseModel):
+    full_name: str
+
+
+class WebhookBranch(BaseModel):
+    sha: str
+    ref: str
+
+
+class WebhookPullRequest(BaseModel):
+    user: WebhookUser
+    title: str
+    head: WebhookBranch
+    html_url: str
+
+
+class PullRequestEvent(BaseModel):
+    """The parts of a pull_request webhook payload used by the scanner."""
+    action: Optional[str] = None
+    number: int
+    repository: WebhookRepository
+    pull_request: WebhookPullRequest
+
+
+# 'sha256=' followed by a hex SHA-256 digest
+SIGNATURE_LENGTH = len('sha256=') + 64
+
+
+async def read_signed_body(request: Request) -> tuple:
     """
-    Verify GitHub webhook signature using HMAC SHA256
+    Read the webhook body, feeding each chunk into the webhook HMAC as it
+    arrives instead of hashing the whole payload afterwards.
+    
+    Returns:
+        (body, HMAC-SHA256 digest of the body, or None if no webhook
+        secret is configured)
+    """
+    # Reading the secret may call Secret Manager; keep that off the event loop
+    secret, mac = await asyncio.to_thread(lambda: (config.webhook_secret, config.webhook_hmac))
+    if not secret:
+        logger.error("❌ Webhook secret not configured!")
+        mac = None
+    else:
+        mac = mac.copy()
+    body = bytearray()
+    async for chunk in request.stream():
+        if mac is not None:
+            mac.update(chunk)
+        body += chunk
+    return body, mac.digest() if mac is not None else None
+
+
+def parse_github_signature(signature: Optional[str]) -> Optional[bytes]:
+    """
+    Check the X-Hub-Signature-256 header's format and decode its digest.
+    Cheap, so malformed requests are rejected before the body is read or hashed.
+    
+    Returns:
+        The 32-byte digest, or None if the header is missing or malformed
     """
     if not signature:
         logger.warning("⚠️ No signature provided in webhook request")
-        return False
+        return None
     
-    if not signature.startswith('sha256='):
-        logger.warning("⚠️ Invalid signature format (must start with 'sha256=')")
-        return False
+    if len(signature) != SIGNATURE_LENGTH or not signature.startswith('sha256='):
+        logger.warning("⚠️ Invalid signature format (must be 'sha256=' + 64 hex chars)")
+        return None
     
-    secret = config.webhook_secret
-    if not secret:
-        logger.error("❌ Webhook secret not configured!")
-        return False
+    try:
+        return bytes.fromhex(signature[7:])
+    except ValueError:
+        logger.warning("⚠️ Invalid signature format (not hex)")
+        return None
+
+
+def verify_github_signature(expected_digest: bytes, provided_digest: Optional[bytes]) -> bool:
+    """
+    Verify GitHub webhook signature using HMAC SHA256
     
-    expected_signature = hmac.new(
-        secret.encode('utf-8'),
-        payload,
-        hashlib.sha256
-    ).hexdigest()
+    Args:
+        expected_digest: HMAC of the received body, None without a
+                         webhook secret (see read_signed_body)
+        provided_digest: Digest from the header (see parse_github_signature)
+    """
+    if provided_digest is None or expected_digest is None:
+        return False
     
-    provided_signature = signature.split('=')[1]
-    is_valid = hmac.compare_digest(expected_signature, provided_signature)
+    # Compare raw 32-byte digests instead of hex strings
+    is_valid = hmac.compare_digest(expected_digest, provided_digest)
     
     if not is_valid:
         logger.warning("⚠️ Webhook signature verification FAILED!")
@@ -651,23 +790,15 @@ def verify_github_signature(payload: bytes, signature: Optional[str]) -> bool:
 
 def is_repo_allowed(repo_name: str) -> bool:
     """Check if repository is in the allowed list"""
-    allowed_repos = config.allowed_repos
-    
-    if not allowed_repos:
+    if not config.allowed_repos:
         logger.warning("⚠️ No allowed repos configured - blocking all")
         return False
     
-    for pattern in allowed_repos:
-        if pattern.endswith('/*'):
-            org = pattern[:-2]
-            if repo_name.startswith(f"{org}/"):
-                logger.info(f"✅ Repo {repo_name} matches wildcard pattern: {pattern}")
-                return True
-        elif pattern == repo_name:
-            logger.info(f"✅ Repo {repo_name} is explicitly allowed")
-            return True
+    if config.is_repo_allowed(repo_name):
+        logger.info("✅ Repo %s is allowed", repo_name)
+        return True
     
-    logger.warning(f"⚠️ Repo {repo_name} not in allowed list")
+    logger.warning("⚠️ Repo %s not in allowed list", repo_name)
     return False
 
 
@@ -773,12 +904,14 @@ async def process_pr_scan_background(
     """
     Background task to process PR scan without blocking webhook response.
     This prevents GitHub webhook timeout (10 seconds limit).
+    
+    Returns True once the scan has completed, False if it failed.
     """
     try:
         # Check if GitHub client is available
         if not github_client:
             logger.error("❌ [Background] GitHub client not initialized")
-            return
+            return False
         
         # Type assertion for linter - github_client is guaranteed to be non-None after check above
         assert github_client is not None, "GitHub client must be initialized"
@@ -790,94 +923,174 @@ async def process_pr_scan_background(
         db = SessionLocal()
         
         try:
-            logger.info(f"📁 [Background] Fetching files from PR #{pr_number}...")
-            pr_files = client.get_pr_files(repo_name, pr_number)
-            
-            if not pr_files:
-                logger.warning(f"⚠️ [Background] No text files to scan in PR #{pr_number}")
-                if pr_sha and len(pr_sha) >= 7:
-                    client.set_commit_status(
-                        repo_name, pr_sha, 'success', '✅ No files to scan'
-                    )
-                return
-            
-            logger.info(f"✅ [Background] Found {len(pr_files)} files to scan")
-            logger.info(f"📧 [Background] Fetching author email for PR #{pr_number}...")
-            author_email = client.get_pr_author_email(repo_name, pr_number)
-            
-            logger.info("🔍 [Background] Running security scan...")
+            # Files are scanned page by page as they are fetched; the author's
+            # email is an independent lookup that runs alongside
+            logger.info("🔍 [Background] Fetching and scanning files of PR #%s...", pr_number)
             metadata = {
                 "repo": repo_name,
                 "branch": branch,
                 "author": pr_author,
-                "author_email": author_email,
                 "pr_url": pr_url
             }
+            pr_files = client.iter_pr_files(repo_name, pr_number, head_sha=pr_sha)
+            scan_result, author_email = await asyncio.gather(
+                asyncio.to_thread(run_security_scan, pr_files, metadata),
+                asyncio.to_thread(client.get_pr_author_email, repo_name, pr_number, head_sha=pr_sha),
+            )
+            files_scanned = scan_result.get("files_scanned", 0)
             
-            scan_result = run_security_scan(pr_files, metadata)
+            if not files_scanned:
+                logger.warning("⚠️ [Background] No text files to scan in PR #%s", pr_number)
+                if pr_sha and len(pr_sha) >= 7:
+                    await asyncio.to_thread(
+                        client.set_commit_status,
+                        repo_name, pr_sha, 'success', '✅ No files to scan'
+                    )
+                return True
+            
+            logger.info("✅ [Background] Scanned %s files", files_scanned)
+            scan_result["author_email"] = author_email
             
             action_taken = scan_result.get('action', 'PASS')
             severity = scan_result.get('severity', 'low')
             issues_count = len(scan_result.get('issues', []))
             
-            logger.info(f"📊 [Background] Scan Results: {action_taken} | Severity: {severity} | Issues: {issues_count}")
+            logger.info("📊 [Background] Scan Results: %s | Severity: %s | Issues: %s", action_taken, severity, issues_count)
             
-            # Save to database
-            try:
-                save_scan_result(
-                    db=db,
-                    repo_name=repo_name,
-                    pr_number=pr_number,
-                    pr_title=pr_title,
-                    pr_url=pr_url,
-                    commit_sha=pr_sha,
-                    branch=branch,
-                    author=pr_author,
-                    scan_result=scan_result,
-                    files_scanned=len(pr_files)
-                )
-                logger.info("✅ [Background] Scan result saved to database")
-            except Exception as e:
-                logger.error(f"⚠️ [Background] Failed to save scan result: {e}", exc_info=True)
+            # Saving, the final commit status and the alerts don't depend on
+            # each other; run them together
+            async def save_result():
+                try:
+                    await asyncio.to_thread(
+                        save_scan_result,
+                        db=db,
+                        repo_name=repo_name,
+                        pr_number=pr_number,
+                        pr_title=pr_title,
+                        pr_url=pr_url,
+                        commit_sha=pr_sha,
+                        branch=branch,
+                        author=pr_author,
+                        scan_result=scan_result,
+                        files_scanned=files_scanned
+                    )
+                    logger.info("✅ [Background] Scan result saved to database")
+                except Exception as e:
+                    logger.error("⚠️ [Background] Failed to save scan result: %s", e, exc_info=True)
             
-            # Set final commit status
-            if pr_sha and len(pr_sha) >= 7:
+            async def set_final_status():
+                if not (pr_sha and len(pr_sha) >= 7):
+                    return
                 if action_taken == 'BLOCK':
-                    client.set_commit_status(
-                        repo_name, pr_sha, 'failure',
-                        f'🚫 Security issues found ({issues_count} critical)'
-                    )
+                    state, description = 'failure', f'🚫 Security issues found ({issues_count} critical)'
                 elif action_taken == 'WARN':
-                    client.set_commit_status(
-                        repo_name, pr_sha, 'success',
-                        f'⚠️ Warnings found ({issues_count} issues)'
-                    )
+                    state, description = 'success', f'⚠️ Warnings found ({issues_count} issues)'
                 else:
-                    client.set_commit_status(
-                        repo_name, pr_sha, 'success', '✅ Security scan passed'
-                    )
+                    state, description = 'success', '✅ Security scan passed'
+                await asyncio.to_thread(
+                    client.set_commit_status, repo_name, pr_sha, state, description
+                )
             
-            # Send Slack notification if needed
-            if action_taken in ['BLOCK', 'WARN'] and issues_count > 0:
-                logger.info("📢 [Background] Sending Slack notification...")
-                try:
-                    report_security_issue(scan_result, pr_url)
-                except Exception as e:
-                    logger.error(f"⚠️ [Background] Failed to send Slack notification: {e}")
+            async def send_alerts():
+                # Send Slack notification if needed
+                if action_taken in ['BLOCK', 'WARN'] and issues_count > 0:
+                    logger.info("📢 [Background] Sending Slack notification...")
+                    try:
+                        await report_security_issue(scan_result, pr_url)
+                    except Exception as e:
+                        logger.error("⚠️ [Background] Failed to send Slack notification: %s", e)
+            
+            await asyncio.gather(save_result(), set_final_status(), send_alerts())
             
-            logger.info(f"✅ [Background] Successfully processed PR #{pr_number}")
+            logger.info("✅ [Background] Successfully processed PR #%s", pr_number)
+            return True
         finally:
             db.close()
     except Exception as e:
-        logger.error(f"❌ [Background] Error processing PR scan: {e}", exc_info=True)
+        logger.error("❌ [Background] Error processing PR scan: %s", e, exc_info=True)
         try:
             if github_client and pr_sha and len(pr_sha) >= 7:
                 client = github_client  # Use local reference
-                client.set_commit_status(
+                await asyncio.to_thread(
+                    client.set_commit_status,
                     repo_name, pr_sha, 'error', '⚠️ Error during scan'
                 )
         except Exception:
             pass
+        return False
+
+
+# Webhook redeliveries (same X-GitHub-Delivery) of a completed scan and repeat
+# events for a head commit whose scan is queued or running are acknowledged
+# without scanning again. A delivery is only remembered once its scan has
+# completed, so a failed (or lost) scan can be redelivered from GitHub.
+WEBHOOK_DELIVERY_TTL = 600
+_seen_deliveries = TTLCache(maxsize=10_000, ttl=WEBHOOK_DELIVERY_TTL)
+# (repo, PR, head SHA) of every scan from queueing until its job finishes
+_scans_in_flight: set = set()
+
+
+def duplicate_response(reason: str, repo_name: str, pr_number: int) -> dict:
+    logger.info("♻️ Skipping duplicate webhook for %s PR #%s (%s)", repo_name, pr_number, reason)
+    return {
+        "status": "duplicate",
+        "reason": reason,
+        "repo": repo_name,
+        "pr": pr_number,
+    }
+
+
+# PR scans are drained from an in-process queue by this many worker tasks
+MAX_CONCURRENT_SCANS = int(os.getenv('MAX_CONCURRENT_SCANS', '4'))
+_scan_queue: asyncio.Queue = asyncio.Queue()
+_scan_workers: List[asyncio.Task] = []
+
+
+def record_scan_outcome(delivery_id: Optional[str], scan_key: tuple, succeeded: bool) -> None:
+    """Release the in-flight guard and remember a completed delivery."""
+    _scans_in_flight.discard(scan_key)
+    if succeeded and delivery_id:
+        _seen_deliveries[delivery_id] = True
+
+
+async def scan_worker(worker_id: int):
+    """Run queued PR scans one at a time until cancelled on shutdown."""
+    while True:
+        delivery_id, scan_args = await _scan_queue.get()
+        succeeded = False
+        try:
+            succeeded = await process_pr_scan_background(**scan_args)
+        except Exception as e:
+            logger.error("❌ [Worker %s] Scan failed: %s", worker_id, e, exc_info=True)
+        finally:
+            record_scan_outcome(
+                delivery_id,
+                (scan_args["repo_name"], scan_args["pr_number"], scan_args["pr_sha"]),
+                succeeded
+            )
+            _scan_queue.task_done()
+
+
+async def enqueue_pr_scan(repo_name: str, pr_sha: str, delivery_id: Optional[str] = None, **scan_args):
+    """
+    Mark the commit as pending, then hand the scan to the worker queue.
+    Run after the webhook response so GitHub gets its answer right away.
+    """
+    if github_client and pr_sha and len(pr_sha) >= 7:
+        logger.info("⏳ [Background] Setting pending status...")
+        try:
+            await asyncio.to_thread(
+                github_client.set_commit_status,
+                repo_name,
+                pr_sha,
+                'pending',
+                '🔍 Security scan in progress...'
+            )
+        except Exception as e:
+            logger.warning("⚠️ [Background] Could not set pending status: %s", e)
+    
+    await _scan_queue.put((delivery_id, dict(repo_name=repo_name, pr_sha=pr_sha, **scan_args)))
+    logger.info("📥 [Background] Scan queued (%s waiting)", _scan_queue.qsize())
 
 
 @app.post("/webhook/github")
@@ -892,16 +1105,23 @@ async def github_webhook(
     """
     GitHub webhook endpoint - receives PR events
     """
-    logger.info(f"📨 Received webhook - Event: {x_github_event}, Delivery: {x_github_delivery}")
+    logger.info("📨 Received webhook - Event: %s, Delivery: %s", x_github_event, x_github_delivery)
     
     # Initialize variables for error handling
     repo_name: Optional[str] = None
     pr_sha: Optional[str] = None
     
     try:
-        payload_bytes = await request.body()
+        provided_digest = parse_github_signature(x_hub_signature_256)
+        if provided_digest is None:
+            raise HTTPException(
+                status_code=401, 
+                detail="Invalid signature - webhook authentication failed"
+            )
         
-        if not verify_github_signature(payload_bytes, x_hub_signature_256):
+        payload_bytes, payload_digest = await read_signed_body(request)
+        
+        if not verify_github_signature(payload_digest, provided_digest):
             logger.error("❌ Invalid webhook signature - rejecting request")
             raise HTTPException(
                 status_code=401, 
@@ -910,79 +1130,80 @@ async def github_webhook(
         
         logger.info("✅ Webhook signature verified")
         
-        try:
-            payload = json.loads(payload_bytes.decode('utf-8'))
-        except json.JSONDecodeError as e:
-            logger.error(f"❌ Invalid JSON payload: {e}")
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
-        
         if x_github_event != "pull_request":
-            logger.info(f"⏭️ Ignoring {x_github_event} event (only processing pull_request)")
+            logger.info("⏭️ Ignoring %s event (only processing pull_request)", x_github_event)
             return {
                 "status": "ignored",
                 "reason": f"Event type '{x_github_event}' is not processed",
                 "processed_events": ["pull_request"]
             }
         
-        action = payload.get('action')
-        repo_name = payload['repository']['full_name']
-        pr_number = payload['number']
-        pr_data = payload['pull_request']
-        pr_author = pr_data['user']['login']
-        pr_title = pr_data['title']
-        pr_sha = pr_data['head']['sha']
-        pr_url = pr_data['html_url']
-        branch = pr_data['head']['ref']
+        # Decode straight into the fields we use; everything else is skipped
+        try:
+            event = PullRequestEvent.model_validate_json(payload_bytes)
+        except ValidationError as e:
+            logger.error("❌ Invalid pull_request payload: %s", e)
+            raise HTTPException(status_code=400, detail="Invalid pull_request payload")
         
-        # Ensure these are strings (they should be from payload)
-        if not isinstance(repo_name, str) or not isinstance(pr_sha, str):
-            raise HTTPException(status_code=400, detail="Invalid payload: missing required fields")
+        action = event.action
+        repo_name = event.repository.full_name
+        pr_number = event.number
+        pr_data = event.pull_request
+        pr_author = pr_data.user.login
+        pr_title = pr_data.title
+        pr_sha = pr_data.head.sha
+        pr_url = pr_data.html_url
+        branch = pr_data.head.ref
         
-        logger.info(f"📋 PR Details: {repo_name} PR #{pr_number} by @{pr_author}")
+        logger.info("📋 PR Details: %s PR #%s by @%s", repo_name, pr_number, pr_author)
         
-        if not is_repo_allowed(repo_name):
-            logger.warning(f"❌ Repository {repo_name} not authorized")
+        # Allowed repos and the GitHub token may come from Secret Manager
+        if not await asyncio.to_thread(is_repo_allowed, repo_name):
+            logger.warning("❌ Repository %s not authorized", repo_name)
             raise HTTPException(
                 status_code=403,
                 detail=f"Repository '{repo_name}' is not in the allowed list"
             )
         
         if action not in ['opened', 'synchronize', 'reopened']:
-            logger.info(f"⏭️ Ignoring action '{action}'")
+            logger.info("⏭️ Ignoring action '%s'", action)
             return {
                 "status": "ignored",
                 "reason": f"Action '{action}' does not trigger scanning",
             }
         
+        await asyncio.to_thread(refresh_github_client)
         if not github_client:
             raise HTTPException(status_code=503, detail="GitHub client not initialized")
         
-        # Set pending status immediately
-        logger.info("⏳ Setting pending status...")
-        if pr_sha and len(pr_sha) >= 7:
-            github_client.set_commit_status(
-                repo_name,
-                pr_sha,
-                'pending',
-                '🔍 Security scan in progress...'
-            )
+        if x_github_delivery and x_github_delivery in _seen_deliveries:
+            return duplicate_response("delivery already processed", repo_name, pr_number)
+        scan_key = (repo_name, pr_number, pr_sha)
+        if scan_key in _scans_in_flight:
+            return duplicate_response("head commit already queued", repo_name, pr_number)
+        
+        # Held until the worker finishes the job (see record_scan_outcome);
+        # the delivery itself is recorded once the scan has completed
+        _scans_in_flight.add(scan_key)
         
-        # Queue background task for processing (returns immediately)
-        logger.info(f"📋 Queuing PR #{pr_number} for background processing...")
+        # Queue for the scan workers (returns immediately);
+        # the pending status is set on the way in
+        logger.info("📋 Queuing PR #%s for background processing...", pr_number)
         background_tasks.add_task(
-            process_pr_scan_background,
+            enqueue_pr_scan,
             repo_name=repo_name,
             pr_number=pr_number,
             pr_title=pr_title,
             pr_url=pr_url,
             pr_sha=pr_sha,
             branch=branch,
-            pr_author=pr_author
+            pr_author=pr_author,
+            delivery_id=x_github_delivery
         )
         
         # Return immediately to avoid GitHub timeout
         # Use 202 Accepted since we're processing asynchronously
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=status.HTTP_202_ACCEPTED,
             content={
                 "status": "accepted",
@@ -997,11 +1218,12 @@ async def github_webhook(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"❌ Unexpected error processing webhook: {e}", exc_info=True)
+        logger.error("❌ Unexpected error processing webhook: %s", e, exc_info=True)
         
         try:
             if github_client and 'repo_name' in locals() and 'pr_sha' in locals() and repo_name and pr_sha:
-                github_client.set_commit_status(
+                await asyncio.to_thread(
+                    github_client.set_commit_status,
                     repo_name, pr_sha, 'error', '⚠️ Internal error during scan'
                 )
         except Exception:
@@ -1017,12 +1239,13 @@ async def webhook_diagnostics():
     Returns webhook endpoint info and configuration status.
     """
     try:
-        webhook_secret_configured = bool(config.webhook_secret)
+        webhook_secret, github_token, allowed_repos = await asyncio.to_thread(
+            lambda: (config.webhook_secret, config.github_token, config.allowed_repos)
+        )
+        webhook_secret_configured = bool(webhook_secret)
         github_client_configured = github_client is not None
-        allowed_repos = config.allowed_repos
         
         # Get base URL from request (if available)
-        import os
         base_url = os.getenv('BACKEND_URL', 'http://localhost:8000')
         
         return {
@@ -1030,8 +1253,8 @@ async def webhook_diagnostics():
             "webhook_endpoint": f"{base_url}/webhook/github",
             "configuration": {
                 "webhook_secret_configured": webhook_secret_configured,
-                "webhook_secret_length": len(config.webhook_secret) if config.webhook_secret else 0,
-                "github_token_configured": bool(config.github_token),
+                "webhook_secret_length": len(webhook_secret) if webhook_secret else 0,
+                "github_token_configured": bool(github_token),
                 "github_client_initialized": github_client_configured,
                 "allowed_repos": allowed_repos,
                 "allowed_repos_count": len(allowed_repos),
@@ -1045,7 +1268,7 @@ async def webhook_diagnostics():
             },
             "health": {
                 "backend": "operational",
-                "database": check_database_health(),
+                "database": await asyncio.to_thread(check_database_health),
             }
         }
     except Exception as e:
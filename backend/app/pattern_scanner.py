@@ -2,87 +2,117 @@
 
 import re
 import logging
-from app.patterns import SECRET_PATTERNS, PII_PATTERNS, COMMENT_IGNORE_MARKERS
+from app.patterns import (
+    SECRET_PATTERNS, ALL_COMPILED, RULE_TRIGGERS, RULE_VALIDATORS, COMMENT_IGNORE_MARKERS
+)
 
 logger = logging.getLogger(__name__)
 
-def should_ignore_line(file_path: str, line_content: str) -> bool:
+# Added lines of a unified diff ('+' but not the '+++' file header);
+# group 1 is the line without its '+'
+ADDED_LINE_RE = re.compile(rb"^\+(?!\+\+)([^\n]*)", re.MULTILINE)
+
+SECRET_FIX_HINT = "Use Environment Variables (os.environ) instead of hardcoding."
+
+# rule -> (severity, fix_code or None); secrets block, PII is flagged
+RULE_META = {
+    rule_name: ("CRITICAL", SECRET_FIX_HINT) if rule_name in SECRET_PATTERNS else ("HIGH", None)
+    for rule_name in ALL_COMPILED
+}
+
+# (rule, pattern, triggers, validator, severity, fix_code) in ALL_COMPILED
+# order; triggers / validator are None for rules without a prefilter / post-check
+_RULES = tuple(
+    (rule_name, pattern, RULE_TRIGGERS.get(rule_name), RULE_VALIDATORS.get(rule_name))
+    + RULE_META[rule_name]
+    for rule_name, pattern in ALL_COMPILED.items()
+)
+
+EXT_TO_LANG = {
+    'py': 'python', 'js': 'javascript', 'jsx': 'javascript', 
+    'ts': 'typescript', 'tsx': 'typescript', 'java': 'java', 
+    'go': 'go', 'rb': 'ruby', 'php': 'php', 'c': 'c', 
+    'cpp': 'cpp', 'sh': 'bash', 'yaml': 'yaml', 'yml': 'yaml', 
+    'dockerfile': 'dockerfile', 'sql': 'sql'
+}
+
+def get_ignore_marker(file_path: str) -> bytes:
     """
-    Checks if a line contains a valid 'sentinel-ignore' comment 
-    appropriate for the file's language.
+    Returns the 'sentinel-ignore' comment marker for the file's language.
     """
     # 1. Determine Language from Extension
     ext = file_path.lower().split('.')[-1] if '.' in file_path else ''
-    
-    ext_to_lang = {
-        'py': 'python', 'js': 'javascript', 'jsx': 'javascript', 
-        'ts': 'typescript', 'tsx': 'typescript', 'java': 'java', 
-        'go': 'go', 'rb': 'ruby', 'php': 'php', 'c': 'c', 
-        'cpp': 'cpp', 'sh': 'bash', 'yaml': 'yaml', 'yml': 'yaml', 
-        'dockerfile': 'dockerfile', 'sql': 'sql'
-    }
-    
-    lang = ext_to_lang.get(ext, 'python') # Default to python
+    lang = EXT_TO_LANG.get(ext, 'python') # Default to python
     
     # 2. Get the marker for that language
-    marker = COMMENT_IGNORE_MARKERS.get(lang, '# sentinel-ignore:')
-    
-    # 3. Check if line contains the marker
-    if marker in line_content:
-        return True
-        
-    return False
+    return COMMENT_IGNORE_MARKERS.get(lang, b'# sentinel-ignore:')
+
+def should_ignore_line(file_path: str, line_content) -> bool:
+    """
+    Checks if a line contains a valid 'sentinel-ignore' comment 
+    appropriate for the file's language.
+    """
+    if isinstance(line_content, str):
+        line_content = line_content.encode('utf-8', 'replace')
+    return get_ignore_marker(file_path) in line_content
 
 def scan_diff_for_patterns(diff_text, filename="unknown"):
     """
     Scans the git diff for regex matches (Secrets & PII).
     Accepts filename to determine correct ignore-comment syntax.
+    diff_text should be UTF-8 bytes; a str is encoded first.
     """
     found_issues = []
     
     if not diff_text:
         return []
 
-    ALL_PATTERNS = {**SECRET_PATTERNS, **PII_PATTERNS}
-    lines = diff_text.split('\n')
+    if isinstance(diff_text, str):
+        diff_text = diff_text.encode('utf-8', 'replace')
 
-    for line_num, line in enumerate(lines):
-        # 1. Skip Metadata and Binary file warnings
-        if line.startswith('Binary files'):
-            continue
+    marker = get_ignore_marker(filename)
+    
+    # Line numbers are only worked out for lines that produce an issue
+    counted_pos = 0
+    counted_line = 1
 
-        # 2. Only check added lines
-        if not line.startswith('+') or line.startswith('+++'):
-            continue
+    # 1. Only check added lines (metadata, context and binary notices never start with '+')
+    for match in ADDED_LINE_RE.finditer(diff_text):
+        clean_line = match.group(1)
 
-        # 3. CHECK WHITELIST: Use context-aware ignore logic
-        if should_ignore_line(filename, line):
+        # 2. CHECK WHITELIST: Use context-aware ignore logic
+        if marker in clean_line:
             continue
 
-        # 4. Clean the line
-        clean_line = line[1:]
-        
-        # 5. Run Regex
-        for rule_name, pattern in ALL_PATTERNS.items():
-            try:
-                if re.search(pattern, clean_line):
-                    severity = "CRITICAL" if rule_name in SECRET_PATTERNS else "HIGH"
-                    
-                    issue = {
-                        "type": "Pattern Violation",
-                        "severity": severity,
-                        "rule": rule_name,
-                        "line": line_num + 1,
-                        "description": f"Detected potential {rule_name}",
-                    }
-
-                    if rule_name in SECRET_PATTERNS:
-                        issue["fix_code"] = "Use Environment Variables (os.environ) instead of hardcoding."
-                    
-                    found_issues.append(issue)
-
-            except re.error as e:
-                logger.error(f"Regex error in rule {rule_name}: {e}")
-                continue
-
-    return found_issues
\ No newline at end of file
+        # 3. Run Regex, skipping rules whose trigger literals are absent
+        lowered = clean_line.lower()
+        for rule_name, pattern, triggers, validator, severity, fix_code in _RULES:
+            if triggers is not None:
+                for trigger in triggers:
+                    if trigger in lowered:
+                        break
+                else:
+                    continue
+            if validator is None:
+                hit = pattern.search(clean_line) is not None
+            else:
+                hit = any(validator(m.group(0)) for m in pattern.finditer(clean_line))
+            if hit:
+                start = match.start()
+                counted_line += diff_text.count(b'\n', counted_pos, start)
+                counted_pos = start
+                
+                issue = {
+                    "type": "Pattern Violation",
+                    "severity": severity,
+                    "rule": rule_name,
+                    "line": counted_line,
+                    "description": f"Detected potential {rule_name}",
+                }
+
+                if fix_code is not None:
+                    issue["fix_code"] = fix_code
+                
+                found_issues.append(issue)
+
+    return found_issues
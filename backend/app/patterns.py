@@ -4,64 +4,109 @@
 ATF Sentinel - Security Pattern Database
 This module defines regex patterns to detect secrets, credentials, and PII.
 It is used by the pattern_scanner module to flag high-risk code changes.
+Patterns are compiled once at import; an invalid pattern fails at startup.
+Patterns are bytes regexes: diffs are scanned as UTF-8 bytes, so digit,
+whitespace and word-boundary classes are ASCII-only.
+Every pattern must stay linear on long lines (no nested or leading
+unbounded repeats that the engine can retry from each offset).
 """
 
+import re
+
 # 1. High-Entropy Secrets (The "Block Immediately" List)
 SECRET_PATTERNS = {
-    # AWS
-    "AWS_ACCESS_KEY_ID": r"(?<![A-Z0-9])AKIA[0-9A-Z]{16}(?![A-Z0-9])",
-    "AWS_SECRET_ACCESS_KEY": r"(?i)(?:aws_secret_access_key|[a-z0-9_]*secret[a-z0-9_]*key[a-z0-9_]*)['\"]?\s*[:=]\s*['\"]?[A-Za-z0-9\/+=]{40}['\"]?",
+    # AWS (secret key: an identifier containing "secret" then "key", matched
+    # from the identifier's start only so long lines are scanned once)
+    "AWS_ACCESS_KEY_ID": re.compile(rb"(?<![A-Z0-9])AKIA[0-9A-Z]{16}(?![A-Z0-9])"),
+    "AWS_SECRET_ACCESS_KEY": re.compile(rb"(?<![a-z0-9_])(?=(?>[a-z0-9_]*?secret)[a-z0-9_]*?key)[a-z0-9_]++['\"]?\s*[:=]\s*['\"]?[A-Za-z0-9\/+=]{40}['\"]?", re.IGNORECASE),
     
     # Google / Firebase
-    "GOOGLE_API_KEY": r"AIza[0-9A-Za-z\-_]{35}",
-    "GCP_PRIVATE_KEY_ID": r"private_key_id['\"]?:\s*['\"]?[a-f0-9]{40}['\"]?",
+    "GOOGLE_API_KEY": re.compile(rb"AIza[0-9A-Za-z\-_]{35}"),
+    "GCP_PRIVATE_KEY_ID": re.compile(rb"private_key_id['\"]?:\s*['\"]?[a-f0-9]{40}['\"]?"),
     
     # Platforms
-    "GITHUB_TOKEN": r"(ghp|gho|ghu|ghs|ghr)_[A-Za-z0-9_]{36}",
-    "SLACK_WEBHOOK": r"https://hooks\.slack\.com/services/T[A-Z0-9]{8,12}/B[A-Z0-9]{8,12}/[A-Z0-9]{24}",
-    "SLACK_BOT_TOKEN": r"xoxb-[0-9]{10,12}-[0-9]{10,12}-[a-zA-Z0-9]{24}",
+    "GITHUB_TOKEN": re.compile(rb"(ghp|gho|ghu|ghs|ghr)_[A-Za-z0-9_]{36}"),
+    "SLACK_WEBHOOK": re.compile(rb"https://hooks\.slack\.com/services/T[A-Z0-9]{8,12}/B[A-Z0-9]{8,12}/[A-Z0-9]{24}"),
+    "SLACK_BOT_TOKEN": re.compile(rb"xoxb-[0-9]{10,12}-[0-9]{10,12}-[a-zA-Z0-9]{24}"),
     
     # Database
-    "DB_CONNECTION_STRING": r"(?i)\b(?:postgres(?:ql)?|mysql|mongodb|redis)://(?:[^@\s:/?#]+(?::[^@\s/?#]*)?@)?[a-zA-Z0-9.\-]+(?:\:\d+)?(?:/[^\s?#]*)?(?:\?[^\s#]*)?",
-    "GENERIC_PRIVATE_KEY": r"-----BEGIN\s+(?:RSA|DSA|EC|OPENSSH|PGP)\s+PRIVATE\s+KEY-----",
+    "DB_CONNECTION_STRING": re.compile(rb"\b(?:postgres(?:ql)?|mysql|mongodb|redis)://(?:[^@\s:/?#]+(?::[^@\s/?#]*)?@)?[a-zA-Z0-9.\-]+(?:\:\d+)?(?:/[^\s?#]*)?(?:\?[^\s#]*)?", re.IGNORECASE),
+    "GENERIC_PRIVATE_KEY": re.compile(rb"-----BEGIN\s+(?:RSA|DSA|EC|OPENSSH|PGP)\s+PRIVATE\s+KEY-----"),
     
     # Generic Password
-    "GENERIC_PASSWORD": (
-        r"(?i)(password|passwd|pwd|secret)['\"]?\s*[:=]\s*['\"]?"
-        r"(?!(?:example|test|placeholder|changeme|password|default|sample|none|empty|yourpassword|admin)['\"]?)"
-        r"(?=[^'\"]{8,})"
-        r"(?=(?:[^A-Z]*[A-Z]))"
-        r"(?=(?:[^a-z]*[a-z]))"
-        r"(?=(?:[^0-9]*[0-9]))"
-        r"[A-Za-z0-9@#$%^&*]{8,}['\"]?"
+    "GENERIC_PASSWORD": re.compile(
+        rb"(password|passwd|pwd|secret)['\"]?\s*+[:=]\s*+['\"]?"
+        rb"(?!(?:example|test|placeholder|changeme|password|default|sample|none|empty|yourpassword|admin)['\"]?)"
+        rb"(?=[A-Za-z0-9@#$%^&*]{8})"
+        rb"(?=[^'\"]{8,})"
+        rb"(?=(?:[^A-Z]*[A-Z]))"
+        rb"(?=(?:[^a-z]*[a-z]))"
+        rb"(?=(?:[^0-9]*[0-9]))"
+        rb"[A-Za-z0-9@#$%^&*]{8,}['\"]?",
+        re.IGNORECASE
     )
 }
 
 # 2. Personally Identifiable Information (PII)
 PII_PATTERNS = {
-    "EMAIL_ADDRESS": r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+",
-    "CREDIT_CARD": r"\b(?:4[0-9]{3}([ -]?)\d{4}\1\d{4}\1\d{4}"
-                   r"|5[1-5]\d{2}([ -]?)\d{4}\2\d{4}\2\d{4}"
-                   r"|3[47]\d{2}([ -]?)\d{6}\3\d{5}"
-                   r")\b",
-    "PHONE_NUMBER_JP": r"0\d{1,4}-\d{1,4}-\d{4}",
-    "IPV4_ADDRESS": r"\b(?:(?:25[0-5]|2[0-4][0-9]|1\d{2}|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4][0-9]|1\d{2}|[1-9]?\d)\b"
+    "EMAIL_ADDRESS": re.compile(rb"(?<![a-zA-Z0-9_.+-])[a-zA-Z0-9_.+-]++@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"),
+    "CREDIT_CARD": re.compile(rb"\b(?:4[0-9]{3}([ -]?)\d{4}\1\d{4}\1\d{4}"
+                              rb"|5[1-5]\d{2}([ -]?)\d{4}\2\d{4}\2\d{4}"
+                              rb"|3[47]\d{2}([ -]?)\d{6}\3\d{5}"
+                              rb")\b"),
+    # Not part of a longer digit/dash run (dates, serials, lockfile hashes)
+    "PHONE_NUMBER_JP": re.compile(rb"(?<![\d-])0\d{1,4}-\d{1,4}-\d{4}(?![\d-])"),
+    # Not part of a longer dotted number such as a 5+ part version string
+    "IPV4_ADDRESS": re.compile(rb"(?<![\d.])\b(?:(?:25[0-5]|2[0-4][0-9]|1\d{2}|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4][0-9]|1\d{2}|[1-9]?\d)\b(?!\.\d)")
+}
+
+# Every rule, secrets first; used by the scanner's per-line loop
+ALL_COMPILED = {**SECRET_PATTERNS, **PII_PATTERNS}
+
+# Prefilter: lowercase literals of which every match contains at least one.
+# A rule's regex only runs on lines whose lowercased text contains a trigger;
+# rules without an entry always run. Rules that start with a literal
+# (AIza, xoxb-, ...) are left out, the regex engine already scans for it.
+RULE_TRIGGERS = {
+    "AWS_ACCESS_KEY_ID": (b"akia",),
+    "AWS_SECRET_ACCESS_KEY": (b"secret",),
+    "DB_CONNECTION_STRING": (b"://",),
+    "GENERIC_PASSWORD": (b"password", b"passwd", b"pwd", b"secret"),
+    "EMAIL_ADDRESS": (b"@",),
+    "IPV4_ADDRESS": (b".",),
+}
+
+# Luhn doubling step per digit: 2*d, minus 9 when that exceeds 9
+_LUHN_DOUBLED = (0, 2, 4, 6, 8, 1, 3, 5, 7, 9)
+
+def luhn_valid(number: bytes) -> bool:
+    """Luhn (mod 10) checksum of a card number; spaces and dashes are ignored."""
+    total = 0
+    for i, digit in enumerate(reversed(number.translate(None, b" -"))):
+        digit -= 48
+        total += _LUHN_DOUBLED[digit] if i & 1 else digit
+    return total % 10 == 0
+
+# Post-checks on the matched text; a rule with a validator only fires when
+# at least one of its matches on the line passes
+RULE_VALIDATORS = {
+    "CREDIT_CARD": luhn_valid,
 }
 
 # 3. Ignore Logic (Context Aware)
 # Maps programming languages to their comment syntax for suppression
 COMMENT_IGNORE_MARKERS = {
-    'python': '# sentinel-ignore:',
-    'javascript': '// sentinel-ignore:',
-    'typescript': '// sentinel-ignore:',
-    'java': '// sentinel-ignore:',
-    'go': '// sentinel-ignore:',
-    'ruby': '# sentinel-ignore:',
-    'php': '// sentinel-ignore:',
-    'c': '// sentinel-ignore:',
-    'cpp': '// sentinel-ignore:',
-    'bash': '# sentinel-ignore:',
-    'yaml': '# sentinel-ignore:',
-    'dockerfile': '# sentinel-ignore:',
-    'sql': '-- sentinel-ignore:',
+    'python': b'# sentinel-ignore:',
+    'javascript': b'// sentinel-ignore:',
+    'typescript': b'// sentinel-ignore:',
+    'java': b'// sentinel-ignore:',
+    'go': b'// sentinel-ignore:',
+    'ruby': b'# sentinel-ignore:',
+    'php': b'// sentinel-ignore:',
+    'c': b'// sentinel-ignore:',
+    'cpp': b'// sentinel-ignore:',
+    'bash': b'# sentinel-ignore:',
+    'yaml': b'# sentinel-ignore:',
+    'dockerfile': b'# sentinel-ignore:',
+    'sql': b'-- sentinel-ignore:',
 }
\ No newline at end of file
@@ -4,7 +4,7 @@ import os
 import logging
 from datetime import datetime, timezone, timedelta
 from app.slack_client import send_slack_alert
-from app.email_client import send_security_email
+from app.email_client import queue_security_email
 
 logger = logging.getLogger(__name__)
 
@@ -12,7 +12,7 @@ logger = logging.getLogger(__name__)
 # Set SECURITY_ADMIN_EMAIL env var to receive email notifications
 SECURITY_ADMIN_EMAIL = os.getenv("SECURITY_ADMIN_EMAIL")
 
-def report_security_issue(scan_result: dict, pr_url: str | None = None):
+async def report_security_issue(scan_result: dict, pr_url: str | None = None):
     """
     Formats scan results and sends a Slack alert.
     
@@ -74,21 +74,21 @@ def report_security_issue(scan_result: dict, pr_url: str | None = None):
         logger.info(f"🚨 Reporting security issue: {alert_data['incident']}")
         logger.info(f"   Severity: {severity.upper()} | Action: {action}")
 
-        success = send_slack_alert(alert_data)
+        success = await send_slack_alert(alert_data)
 
         # Send email alerts for BLOCK and WARN actions
         if action in ["BLOCK", "WARN"]:
             # Always send to security admin
             if SECURITY_ADMIN_EMAIL:
                 logger.info(f"📧 Sending email alert to security admin: {SECURITY_ADMIN_EMAIL}")
-                send_security_email(SECURITY_ADMIN_EMAIL, scan_result)
+                await queue_security_email(SECURITY_ADMIN_EMAIL, scan_result)
             
             # Also send to PR author if they have a valid email (not GitHub noreply)
             author_email = scan_result.get("author_email")
             if author_email and "noreply" not in author_email.lower():
                 if author_email != SECURITY_ADMIN_EMAIL:  # Avoid duplicate
                     logger.info(f"📧 Sending email alert to author: {author_email}")
-                    send_security_email(author_email, scan_result)
+                    await queue_security_email(author_email, scan_result)
 
         return success
 
@@ -8,9 +8,15 @@ from app.security_memory import get_engineer_profile, update_engineer_profile
 
 logger = logging.getLogger(__name__)
 
+# Patches above this size (lockfiles, minified bundles, generated code) are
+# regex-scanned (the patterns are linear) but not sent to the AI
+MAX_PATCH_BYTES = 256 * 1024
+
 def run_security_scan(files_list, metadata=None):
     """
     Orchestrates the scan for a LIST of files.
+    Any iterable works; a generator is scanned file by file as it yields.
+    The number of files seen is returned as 'files_scanned'.
     """
     if metadata is None:
         metadata = {}
@@ -24,26 +30,46 @@ def run_security_scan(files_list, metadata=None):
         logger.warning(f"Failed to fetch engineer profile: {e}")
 
     all_regex_issues = []
-    combined_diff_for_ai = ""
+    ai_skipped_files = []
+    # Collected as chunks and joined once; 'ai_chars' tracks the running length
+    ai_chunks = []
+    ai_chars = 0
+
+    files_scanned = 0
 
     # --- LOOP THROUGH EACH FILE ---
     for file_data in files_list:
+        files_scanned += 1
         filename = file_data.get('filename', 'unknown')
         patch_text = file_data.get('patch', '')
 
         if not patch_text:
             continue
 
-        # 2. Run Regex Scan
-        file_issues = scan_diff_for_patterns(patch_text, filename=filename)
+        patch_bytes = patch_text.encode('utf-8', 'replace')
+
+        # 2. Run Regex Scan (byte-mode regexes are cheaper than str-mode)
+        file_issues = scan_diff_for_patterns(patch_bytes, filename=filename)
         
         for issue in file_issues:
             issue['file'] = filename
             all_regex_issues.append(issue)
 
         # 3. Collect text for AI
-        if len(combined_diff_for_ai) < 10000: 
-            combined_diff_for_ai += f"\n--- File: {filename} ---\n{patch_text}\n"
+        if len(patch_bytes) > MAX_PATCH_BYTES:
+            logger.warning(f"⏭️ Not sending {filename} to AI: patch is {len(patch_bytes)} bytes (limit {MAX_PATCH_BYTES})")
+            ai_skipped_files.append(filename)
+        elif ai_chars < 10000:
+            piece = f"\n--- File: {filename} ---\n{patch_text}\n"
+            ai_chunks.append(piece)
+            ai_chars += len(piece)
+
+    combined_diff_for_ai = "".join(ai_chunks)
+
+    # Reported with every result, but not as issues: oversized patches were still regex-scanned
+    metadata = {**metadata, "files_scanned": files_scanned}
+    if ai_skipped_files:
+        metadata["ai_skipped_files"] = ai_skipped_files
 
     # --- DECISION LOGIC ---
 
@@ -55,7 +81,7 @@ def run_security_scan(files_list, metadata=None):
         return {
             **metadata,
             "incident": "Hardcoded Secrets / PII Detected",
-            "summary_en": f"Found {len(all_regex_issues)} critical patterns across {len(files_list)} files.",
+            "summary_en": f"Found {len(all_regex_issues)} critical patterns across {files_scanned} files.",
             "summary_jp": f"複数のファイルで{len(all_regex_issues)}件の機密情報が検出されました。",
             "action": "BLOCK",
             "severity": "critical",
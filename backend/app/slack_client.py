@@ -1,8 +1,9 @@
 # app/slack_client.py
 
-import requests
+import httpx
 import logging
 import os
+import orjson
 
 # Try to load custom configuration
 try:
@@ -25,8 +26,110 @@ if not SLACK_WEBHOOK_URL and config:
         logger.warning(f"Failed to load Slack webhook from Secret Manager: {e}")
         logger.info("💡 Tip: Set SLACK_WEBHOOK_URL environment variable for local testing")
 
+# One pooled async client for all Slack posts; created on first use so it
+# binds to the running event loop
+_http_client: httpx.AsyncClient | None = None
 
-def send_slack_alert(alert_data: dict) -> bool:
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=10)
+    return _http_client
+
+
+async def close_http_client():
+    """Close the pooled Slack client (called on application shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Severity configuration
+SEVERITY_CONFIG = {
+    'critical': {
+        'indicator': '🔴',
+        'label': 'CRITICAL',
+        'style': 'danger',
+        'color': '#DC143C'
+    },
+    'high': {
+        'indicator': '🟠',
+        'label': 'HIGH',
+        'style': 'danger',
+        'color': '#FF8C00'
+    },
+    'medium': {
+        'indicator': '🟡',
+        'label': 'MEDIUM',
+        'style': 'warning',
+        'color': '#FFD700'
+    },
+    'low': {
+        'indicator': '🟢',
+        'label': 'LOW',
+        'style': 'primary',
+        'color': '#32CD32'
+    }
+}
+
+# Action status mapping
+ACTION_STATUS_MAP = {
+    'BLOCK': '🚫 Merge Blocked',
+    'PASS': '✅ Passed',
+    'REVIEW': '⚠️ Review Required'
+}
+
+# Simple notification prefix per severity
+NOTIFICATION_EMOJI = {
+    "info": "ℹ️",
+    "warning": "⚠️",
+    "error": "❌",
+    "success": "✅"
+}
+
+# Block Kit pieces that never change; shared by every alert (never mutated)
+DIVIDER_BLOCK = {"type": "divider"}
+
+HEADER_BLOCK = {
+    "type": "header",
+    "text": {
+        "type": "plain_text",
+        "text": "🛡️ ATF Sentinel Security Alert",
+        "emoji": True
+    }
+}
+
+GUIDELINES_BUTTON = {
+    "type": "button",
+    "text": {
+        "type": "plain_text",
+        "text": "Security Guidelines",
+        "emoji": False
+    },
+    "url": "https://aitf.co.jp/security/"
+}
+
+FOOTER_BLOCK = {
+    "type": "context",
+    "elements": [
+        {
+            "type": "mrkdwn",
+            "text": "🤖 Automated by ATF Sentinel | Security Scanning System"
+        }
+    ]
+}
+
+
+def truncate(text: str, limit: int) -> str:
+    """Cut text to at most limit characters, ending in '...' when shortened."""
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+async def send_slack_alert(alert_data: dict) -> bool:
     """
     Send security alert to Slack using Block Kit format.
     
@@ -46,55 +149,12 @@ def send_slack_alert(alert_data: dict) -> bool:
     action = alert_data.get('action', 'REVIEW').upper()
     issues_count = alert_data.get('issues_count', 0)
     
-    # Severity configuration
-    severity_config = {
-        'critical': {
-            'indicator': '🔴',
-            'label': 'CRITICAL',
-            'style': 'danger',
-            'color': '#DC143C'
-        },
-        'high': {
-            'indicator': '🟠',
-            'label': 'HIGH',
-            'style': 'danger',
-            'color': '#FF8C00'
-        },
-        'medium': {
-            'indicator': '🟡',
-            'label': 'MEDIUM',
-            'style': 'warning',
-            'color': '#FFD700'
-        },
-        'low': {
-            'indicator': '🟢',
-            'label': 'LOW',
-            'style': 'primary',
-            'color': '#32CD32'
-        }
-    }
-    
-    sev = severity_config.get(severity, severity_config['high'])
-    
-    # Action status mapping
-    action_status_map = {
-        'BLOCK': '🚫 Merge Blocked',
-        'PASS': '✅ Passed',
-        'REVIEW': '⚠️ Review Required'
-    }
-    action_status = action_status_map.get(action, '📋 Manual Review')
+    sev = SEVERITY_CONFIG.get(severity, SEVERITY_CONFIG['high'])
+    action_status = ACTION_STATUS_MAP.get(action, '📋 Manual Review')
     
     # Build Slack Block Kit payload
     blocks = [
-        # Header
-        {
-            "type": "header",
-            "text": {
-                "type": "plain_text",
-                "text": "🛡️ ATF Sentinel Security Alert",
-                "emoji": True
-            }
-        },
+        HEADER_BLOCK,
         # Severity and Status
         {
             "type": "section",
@@ -109,7 +169,7 @@ def send_slack_alert(alert_data: dict) -> bool:
                 }
             ]
         },
-        {"type": "divider"},
+        DIVIDER_BLOCK,
         # Incident Description
         {
             "type": "section",
@@ -152,7 +212,7 @@ def send_slack_alert(alert_data: dict) -> bool:
             }
         })
     
-    blocks.append({"type": "divider"})
+    blocks.append(DIVIDER_BLOCK)
     
     # Impact Assessment
     blocks.extend([
@@ -170,13 +230,11 @@ def send_slack_alert(alert_data: dict) -> bool:
                 "text": f"*📊 Impact Assessment (EN)*\n{alert_data.get('summary_en', 'N/A')}"
             }
         },
-        {"type": "divider"}
+        DIVIDER_BLOCK
     ])
     
     # Recommended Fix
-    fix_text = alert_data.get('fix', 'N/A')
-    if len(fix_text) > 500:
-        fix_text = fix_text[:497] + "..."
+    fix_text = truncate(alert_data.get('fix', 'N/A'), 500)
     
     blocks.append({
         "type": "section",
@@ -187,9 +245,7 @@ def send_slack_alert(alert_data: dict) -> bool:
     })
     
     # Code Diff
-    diff_text = alert_data.get('diff', 'N/A')
-    if len(diff_text) > 1000:
-        diff_text = diff_text[:997] + "..."
+    diff_text = truncate(alert_data.get('diff', 'N/A'), 1000)
     
     blocks.append({
         "type": "section",
@@ -213,36 +269,19 @@ def send_slack_alert(alert_data: dict) -> bool:
                 "url": pr_url,
                 "style": sev['style']
             },
-            {
-                "type": "button",
-                "text": {
-                    "type": "plain_text",
-                    "text": "Security Guidelines",
-                    "emoji": False
-                },
-                "url": "https://aitf.co.jp/security/"
-            }
+            GUIDELINES_BUTTON
         ]
     })
     
     # Footer context
-    blocks.append({
-        "type": "context",
-        "elements": [
-            {
-                "type": "mrkdwn",
-                "text": "🤖 Automated by ATF Sentinel | Security Scanning System"
-            }
-        ]
-    })
+    blocks.append(FOOTER_BLOCK)
     
     # Send to Slack
     try:
-        response = requests.post(
+        response = await _get_http_client().post(
             SLACK_WEBHOOK_URL,
-            json={"blocks": blocks},
-            timeout=10,
-            headers={"Content-Type": "application/json"}
+            content=orjson.dumps({"blocks": blocks}),
+            headers=JSON_HEADERS
         )
         response.raise_for_status()
         logger.info(f"✅ Slack alert sent successfully (Status: {response.status_code})")
@@ -253,20 +292,14 @@ def send_slack_alert(alert_data: dict) -> bool:
         return False
 
 
-def send_simple_notification(message: str, severity: str = "info") -> bool:
+async def send_simple_notification(message: str, severity: str = "info") -> bool:
     """
     Send a simple text notification to Slack.
     """
     if not SLACK_WEBHOOK_URL:
         return False
     
-    emoji_map = {
-        "info": "ℹ️",
-        "warning": "⚠️",
-        "error": "❌",
-        "success": "✅"
-    }
-    emoji = emoji_map.get(severity, "📢")
+    emoji = NOTIFICATION_EMOJI.get(severity, "📢")
     
     payload = {
         "blocks": [
@@ -281,7 +314,9 @@ def send_simple_notification(message: str, severity: str = "info") -> bool:
     }
     
     try:
-        response = requests.post(SLACK_WEBHOOK_URL, json=payload, timeout=10)
+        response = await _get_http_client().post(
+            SLACK_WEBHOOK_URL, content=orjson.dumps(payload), headers=JSON_HEADERS
+        )
         response.raise_for_status()
         return True
     except Exception as e:
@@ -0,0 +1,50 @@
+# backend/tests/test_config.py
+import sys
+import os
+
+# Setup Path to find 'app'
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import Config
+
+
+def test_failed_refresh_keeps_last_loaded_secrets(monkeypatch):
+    for name in ('GITHUB_TOKEN', 'WEBHOOK_SECRET', 'ALLOWED_REPOS'):
+        monkeypatch.delenv(name, raising=False)
+
+    secrets = {
+        'github-token': 'token-1',
+        'webhook-secret': 'hook-1',
+        'allowed-repos': '["acme/*"]',
+    }
+    config = Config()
+    config._fetch_secret = lambda name: secrets[name]
+    assert config.github_token == 'token-1'
+    assert config.webhook_secret == 'hook-1'
+    assert config.is_repo_allowed('acme/api')
+
+    def unavailable(name):
+        raise RuntimeError("Secret Manager unavailable")
+
+    # TTL expiry followed by a failing fetch
+    config._secret_cache.clear()
+    config._fetch_secret = unavailable
+    assert config.github_token == 'token-1'
+    assert config.webhook_secret == 'hook-1'
+    assert config.allowed_repos == ['acme/*']
+    assert config.is_repo_allowed('acme/api')
+    # Served from the negative cache on the next read, still the old values
+    assert config.webhook_secret == 'hook-1'
+
+
+def test_secret_never_loaded_falls_back(monkeypatch):
+    for name in ('WEBHOOK_SECRET', 'ALLOWED_REPOS'):
+        monkeypatch.delenv(name, raising=False)
+
+    def unavailable(name):
+        raise RuntimeError("Secret Manager unavailable")
+
+    config = Config()
+    config._fetch_secret = unavailable
+    assert config.webhook_secret == ''
+    assert config.allowed_repos == ['testorg/*']